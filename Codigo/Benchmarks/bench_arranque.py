@@ -0,0 +1,74 @@
+#Benchmark de arranque de la API: tiempo de importacion y tiempo hasta la primera respuesta.
+#Cada repeticion corre en un proceso nuevo (importacion en frio) sobre una copia temporal de database.db,
+#asi no se modifica la BD del proyecto. La primera repeticion incluye la creacion/migracion del esquema;
+#las siguientes ya encuentran el 'user_version' al dia.
+#
+#Uso (desde la carpeta 'Codigo'):
+#  python Benchmarks/bench_arranque.py
+#  python Benchmarks/bench_arranque.py --repeticiones 10 --ruta /items/items/
+
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+
+CARPETA_CODIGO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#Codigo que se ejecuta en cada proceso hijo; imprime los tiempos en JSON.
+_HIJO = r"""
+import json, sys, time
+inicio = time.perf_counter()
+from practica4_BCHL import app
+importado = time.perf_counter()
+from fastapi.testclient import TestClient
+with TestClient(app) as cliente:
+    iniciado = time.perf_counter()
+    respuesta = cliente.get(sys.argv[1])
+    respondido = time.perf_counter()
+print(json.dumps({
+    "importacion": importado - inicio,
+    "arranque": iniciado - importado,
+    "primera_peticion": respondido - iniciado,
+    "total": respondido - inicio,
+    "status": respuesta.status_code,
+    "algoritmo_cargado": "Servicios.algoritmo_Genetico" in sys.modules,
+}))
+"""
+
+
+#Ejecuta una repeticion en un proceso nuevo y regresa sus tiempos.
+def medir(carpeta, ruta):
+    entorno = dict(os.environ, PYTHONPATH=CARPETA_CODIGO, PYTHONWARNINGS="ignore")
+    salida = subprocess.run([sys.executable, "-c", _HIJO, ruta], cwd=carpeta, env=entorno,
+                            capture_output=True, text=True, check=True)
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mide la importacion y el tiempo hasta la primera peticion de la API.")
+    parser.add_argument("--repeticiones", type=int, default=5, help="Número de arranques a medir")
+    parser.add_argument("--ruta", default="/items/items/", help="Ruta de la primera peticion")
+    parser.add_argument("--bd", default=os.path.join(CARPETA_CODIGO, "database.db"), help="BD que se copia para las pruebas")
+    args = parser.parse_args(argumentos)
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        shutil.copy(args.bd, os.path.join(carpeta, "database.db"))
+        resultados = [medir(carpeta, args.ruta) for _ in range(args.repeticiones)]
+
+    print(f"{'arranque':>8} {'importacion':>12} {'lifespan':>10} {'1a peticion':>12} {'total':>10} {'status':>6} {'AG cargado':>10}")
+    for k, r in enumerate(resultados):
+        print(f"{k:>8} {r['importacion'] * 1000:>10.1f}ms {r['arranque'] * 1000:>8.1f}ms "
+              f"{r['primera_peticion'] * 1000:>10.1f}ms {r['total'] * 1000:>8.1f}ms {r['status']:>6} {str(r['algoritmo_cargado']):>10}")
+    #Mediana de los arranques en caliente (sin el primero, que migra el esquema)
+    calientes = resultados[1:] or resultados
+    print(f"\nMediana (sin el primer arranque): importacion {statistics.median(r['importacion'] for r in calientes) * 1000:.1f}ms, "
+          f"lifespan {statistics.median(r['arranque'] for r in calientes) * 1000:.1f}ms, "
+          f"primera peticion {statistics.median(r['primera_peticion'] for r in calientes) * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#Benchmark: algoritmo genetico puro contra el hibrido (siembra voraz + busqueda local en la elite)
+#Genera instancias aleatorias con semilla fija, las resuelve con ambos y las compara con el optimo
+#de la solucion exacta (ramificacion y poda). No pide datos por teclado.
+#
+#Uso (desde la carpeta 'Codigo'):
+#  python Benchmarks/bench_hibrido.py
+#  python Benchmarks/bench_hibrido.py --objetos 500 --instancias 10 --seed 7
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from Servicios.metodos_Mochila import resolver
+
+
+#Genera una instancia aleatoria; la capacidad es una fraccion del peso total.
+def generar_instancia(num_objetos, rng, fraccion_capacidad):
+    pesos = [rng.randint(10, 100) for _ in range(num_objetos)]
+    valores = [rng.randint(10, 100) for _ in range(num_objetos)]
+    return pesos, valores, sum(pesos) * fraccion_capacidad
+
+
+#Resuelve la instancia y regresa (aptitud, segundos).
+def medir(metodo, pesos, valores, capacidad, **parametros):
+    inicio = time.perf_counter()
+    _, aptitud = resolver(metodo, pesos, valores, capacidad, **parametros)
+    return aptitud, time.perf_counter() - inicio
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Compara el algoritmo genetico puro con el hibrido.")
+    parser.add_argument("--objetos", type=int, default=200, help="Número de objetos por instancia")
+    parser.add_argument("--instancias", type=int, default=5, help="Número de instancias")
+    parser.add_argument("--generaciones", type=int, default=50, help="Número de generaciones")
+    parser.add_argument("--poblacion", type=int, default=20, help="Tamaño de la población")
+    parser.add_argument("--prob-mutacion", type=float, default=0.01, help="Probabilidad de mutacion")
+    parser.add_argument("--prop-voraz", type=float, default=0.3, help="Proporcion sembrada de forma voraz (hibrido)")
+    parser.add_argument("--fraccion-capacidad", type=float, default=0.5, help="Capacidad como fraccion del peso total")
+    parser.add_argument("--seed", type=int, default=42, help="Semilla de las instancias y de las ejecuciones")
+    args = parser.parse_args(argumentos)
+
+    rng = random.Random(args.seed)
+    comun = {
+        "generaciones": args.generaciones,
+        "num_individuos": args.poblacion,
+        "prob_mutacion": args.prob_mutacion,
+    }
+    print(f"{'inst':>4} {'optimo':>10} {'puro':>10} {'hibrido':>10} {'brecha puro':>12} {'brecha hib.':>12} {'s puro':>8} {'s hib.':>8}")
+    brechas_puro, brechas_hibrido = [], []
+    for k in range(args.instancias):
+        pesos, valores, capacidad = generar_instancia(args.objetos, rng, args.fraccion_capacidad)
+        optimo, _ = medir("exacto", pesos, valores, capacidad)
+        puro, t_puro = medir("torneo", pesos, valores, capacidad, seed=args.seed + k, **comun)
+        hibrido, t_hibrido = medir("torneo", pesos, valores, capacidad, seed=args.seed + k,
+                                   prop_voraz=args.prop_voraz, busqueda_local=True, **comun)
+        #Brecha: que tan lejos del optimo quedo cada metodo (en porcentaje)
+        brecha_puro = 100 * (optimo - puro) / optimo if optimo else 0.0
+        brecha_hibrido = 100 * (optimo - hibrido) / optimo if optimo else 0.0
+        brechas_puro.append(brecha_puro)
+        brechas_hibrido.append(brecha_hibrido)
+        print(f"{k:>4} {optimo:>10.1f} {puro:>10.1f} {hibrido:>10.1f} {brecha_puro:>11.2f}% {brecha_hibrido:>11.2f}% {t_puro:>8.3f} {t_hibrido:>8.3f}")
+
+    print(f"\nBrecha promedio: puro {sum(brechas_puro) / len(brechas_puro):.2f}%, "
+          f"hibrido {sum(brechas_hibrido) / len(brechas_hibrido):.2f}%")
+
+
+if __name__ == "__main__":
+    main()
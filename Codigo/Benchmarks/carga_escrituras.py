@@ -0,0 +1,96 @@
+#Prueba de carga de escrituras concurrentes sobre SQLite.
+#Lanza muchos hilos a la vez (por defecto 200) contra la API con una mezcla de escrituras:
+#crear categorias (con nombres repetidos a proposito), modificar un envio y crear items.
+#Al final revisa que no haya errores 500, que todos los items creados esten en la BD,
+#y muestra las latencias. Trabaja sobre una copia temporal de database.db.
+#
+#Uso (desde la carpeta 'Codigo'):
+#  python Benchmarks/carga_escrituras.py
+#  python Benchmarks/carga_escrituras.py --escritores 400
+
+import argparse
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+
+CARPETA_CODIGO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, CARPETA_CODIGO)
+
+
+#Operacion de escritura del hilo k (la mezcla depende de k % 4).
+def _escritura(cliente, k, envio_id, categoria):
+    if k % 4 == 0:
+        #Nombres repetidos: las que ya existen deben dar 400, nunca 500.
+        return "categoria", cliente.post("/categorias/categorias/", json={"nombre": f"carga-{k % 8}"})
+    if k % 4 == 1:
+        return "envio", cliente.patch(f"/envios/envios/{envio_id}", json={"destino": f"destino-{k}"})
+    return "item", cliente.post("/items/items/", json={"ganancia": k, "peso": 1, "categoria_nombres": [categoria]})
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga de escrituras concurrentes.")
+    parser.add_argument("--escritores", type=int, default=200, help="Número de hilos que escriben a la vez")
+    parser.add_argument("--bd", default=os.path.join(CARPETA_CODIGO, "database.db"), help="BD que se copia para la prueba")
+    args = parser.parse_args(argumentos)
+
+    carpeta = tempfile.mkdtemp()
+    shutil.copy(args.bd, os.path.join(carpeta, "database.db"))
+    #La BD y la matriz del optimizador usan rutas relativas, asi que se trabaja dentro de la carpeta temporal.
+    os.chdir(carpeta)
+    #Los errores se cuentan por su codigo de estado; no se imprimen las trazas.
+    logging.disable(logging.CRITICAL)
+    from fastapi.testclient import TestClient
+    from practica4_BCHL import app
+
+    n = args.escritores
+    estados = [None] * n
+    latencias = [0.0] * n
+    try:
+        with TestClient(app, raise_server_exceptions=False) as cliente:
+            items_antes = len(cliente.get("/items/items/").json())
+            envio_id = cliente.get("/envios/envios/").json()[0]["id"]
+            categoria = cliente.get("/categorias/categorias/").json()[0]["nombre"]
+            #Todos los hilos esperan en la barrera para empezar al mismo tiempo.
+            barrera = threading.Barrier(n)
+
+            def escritor(k):
+                barrera.wait()
+                inicio = time.perf_counter()
+                tipo, respuesta = _escritura(cliente, k, envio_id, categoria)
+                latencias[k] = time.perf_counter() - inicio
+                estados[k] = (tipo, respuesta.status_code)
+
+            hilos = [threading.Thread(target=escritor, args=(k,)) for k in range(n)]
+            inicio = time.perf_counter()
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+            transcurrido = time.perf_counter() - inicio
+            items_despues = len(cliente.get("/items/items/").json())
+    finally:
+        os.chdir(CARPETA_CODIGO)
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    conteo = Counter(estados)
+    print(f"Escritores: {n}, tiempo total: {transcurrido:.2f} s")
+    for (tipo, estado), cantidad in sorted(conteo.items()):
+        print(f"  {tipo:<10} {estado}: {cantidad}")
+    errores = sum(c for (_, estado), c in conteo.items() if estado >= 500)
+    creados = sum(c for (tipo, estado), c in conteo.items() if tipo == "item" and estado == 201)
+    guardados = items_despues - items_antes
+    latencias.sort()
+    print(f"Errores 5xx: {errores}")
+    print(f"Items creados (201): {creados}, items nuevos en la BD: {guardados}")
+    print(f"Latencia p50 {latencias[n // 2]:.3f} s, p99 {latencias[min(n - 1, int(n * 0.99))]:.3f} s, max {latencias[-1]:.3f} s")
+    #Codigo de salida distinto de 0 si hubo errores o escrituras perdidas.
+    return 1 if errores or creados != guardados else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
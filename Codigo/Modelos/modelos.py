@@ -1,7 +1,12 @@
 from sqlmodel import Field, SQLModel, Relationship
 from typing import Optional, List
+from datetime import datetime, timezone
 from Esquemas.esquemas import CategoriaBase, ItemBase, EnvioBase
 
+#Devuelve la fecha y hora actual en UTC.
+def ahora_utc():
+    return datetime.now(timezone.utc)
+
 #Define la tabla de enlace (asociativa) para la relacion Item <-> Categoria.
 class ItemCategoria(SQLModel, table=True):
     #Define el campo 'item_id' como clave foranea a 'item.id' y parte de la clave primaria.
@@ -29,6 +34,10 @@ class ItemEnvio(SQLModel, table=True):
 class Categoria(CategoriaBase, table=True):
     #Define la clave primaria 'id' como un entero opcional autogenerado.
     id: Optional[int] = Field(default=None, primary_key=True)
+    #Numero de version del registro; aumenta en cada modificacion (se usa para el ETag).
+    version: int = Field(default=1)
+    #Fecha (UTC) de la ultima modificacion (se usa para 'Last-Modified').
+    actualizado_en: datetime = Field(default_factory=ahora_utc)
     
     #Define la relacion muchos-a-muchos con 'Item', usando 'ItemCategoria' como tabla de enlace.
     items: List["Item"] = Relationship(back_populates="categorias", link_model=ItemCategoria)
@@ -38,6 +47,10 @@ class Categoria(CategoriaBase, table=True):
 class Item(ItemBase, table=True):
     #Define la clave primaria 'id'.
     id: Optional[int] = Field(default=None, primary_key=True)
+    #Numero de version del registro; aumenta en cada modificacion (se usa para el ETag).
+    version: int = Field(default=1)
+    #Fecha (UTC) de la ultima modificacion (se usa para 'Last-Modified').
+    actualizado_en: datetime = Field(default_factory=ahora_utc)
     
     #Define la relacion muchos-a-muchos con 'Categoria', vinculada por 'ItemCategoria'.
     categorias: List[Categoria] = Relationship(back_populates="items", link_model=ItemCategoria)
@@ -49,6 +62,25 @@ class Item(ItemBase, table=True):
 class Envio(EnvioBase, table=True):
     #Define la clave primaria 'id'.
     id: Optional[int] = Field(default=None, primary_key=True)
+    #Numero de version del registro; aumenta en cada modificacion (se usa para el ETag).
+    version: int = Field(default=1)
+    #Fecha (UTC) de la ultima modificacion (se usa para 'Last-Modified').
+    actualizado_en: datetime = Field(default_factory=ahora_utc)
     
     #Define la relacion muchos-a-muchos con 'Item', vinculada por 'ItemEnvio'.
     items: List[Item] = Relationship(back_populates="envios", link_model=ItemEnvio)
+
+#Define la tabla que guarda la mejor solucion del algoritmo genetico para cada envio.
+#Se guarda un renglon por item (y no por posicion en la lista) para poder reutilizarla
+#como punto de partida cuando se agregan o quitan items del envio.
+class SolucionEnvio(SQLModel, table=True):
+    #Define el campo 'envio_id' como clave foranea a 'envio.id' y parte de la clave primaria.
+    envio_id: Optional[int] = Field(
+        default=None, foreign_key="envio.id", primary_key=True
+    )
+    #Define el campo 'item_id' como clave foranea a 'item.id' y parte de la clave primaria.
+    item_id: Optional[int] = Field(
+        default=None, foreign_key="item.id", primary_key=True
+    )
+    #Indica si el item fue seleccionado (gen en 1) en la mejor solucion.
+    seleccionado: bool = False
@@ -0,0 +1,6 @@
+#Configuracion de pytest: permite importar los modulos de 'Codigo' (Modelos, Servicios, ...)
+#igual que cuando se ejecuta la API desde esa carpeta.
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,46 @@
+#Pruebas del metodo exacto de la mochila (Servicios/metodos_Mochila.py).
+#Se compara contra una busqueda exhaustiva en instancias pequenas, incluyendo pesos y ganancias en cero.
+#
+#Uso (desde la carpeta 'Codigo'):
+#  python -m pytest -q Pruebas
+import itertools
+import random
+import pytest
+from Servicios.metodos_Mochila import resolver_exacto
+
+
+#Prueba todas las combinaciones y devuelve la mayor ganancia que cabe en la capacidad.
+def _fuerza_bruta(pesos, valores, capacidad):
+    mejor = 0
+    for genes in itertools.product((0, 1), repeat=len(pesos)):
+        peso = sum(p for p, g in zip(pesos, genes) if g)
+        if peso <= capacidad:
+            mejor = max(mejor, sum(v for v, g in zip(valores, genes) if g))
+    return mejor
+
+
+#Revisa que los genes devueltos correspondan a la ganancia y que quepan en la mochila.
+def _revisar(pesos, valores, capacidad, genes, valor):
+    assert len(genes) == len(pesos)
+    assert sum(p for p, g in zip(pesos, genes) if g) <= capacidad
+    assert sum(v for v, g in zip(valores, genes) if g) == pytest.approx(valor)
+
+
+#Un objeto de peso 0 y ganancia 0 (razon infinita) no debe cortar la busqueda.
+def test_objeto_sin_peso_ni_ganancia():
+    genes, valor = resolver_exacto([0, 5], [0, 10], 10)
+    assert valor == 10
+    assert genes == [0, 1]
+
+
+@pytest.mark.parametrize("semilla", range(200))
+def test_igual_a_fuerza_bruta(semilla):
+    rng = random.Random(semilla)
+    n = rng.randint(0, 9)
+    #Se eligen valores pequenos para que aparezcan ceros y empates seguido.
+    pesos = [rng.choice([0, 0.5, 1, 2, 3, 5, 8]) for _ in range(n)]
+    valores = [rng.choice([0, 0, 1, 2, 4, 7, 10]) for _ in range(n)]
+    capacidad = rng.choice([0, 1, 4, 7.5, 12])
+    genes, valor = resolver_exacto(pesos, valores, capacidad)
+    assert valor == pytest.approx(_fuerza_bruta(pesos, valores, capacidad))
+    _revisar(pesos, valores, capacidad, genes, valor)
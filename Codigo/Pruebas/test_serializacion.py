@@ -0,0 +1,86 @@
+#Pruebas de equivalencia de la serializacion de lectura (Servicios/serializacion.py).
+#Las rutas GET de items y envios deben devolver exactamente los mismos bytes que el camino original:
+#cargar los objetos ORM, validarlos con 'ItemOut'/'EnvioOut' y serializarlos con JSONResponse.
+#
+#Uso (desde la carpeta 'Codigo'):
+#  python -m pytest -q Pruebas
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlmodel import SQLModel, Session, create_engine, select
+from Modelos.modelos import Item, Categoria, Envio
+from Esquemas.esquemas import ItemOut, EnvioOut
+from Servicios.serializacion import RespuestaORJSON, items_como_dict, envios_como_dict
+
+
+#Serializa como lo hacia la ruta original con 'response_model'.
+def _bytes_originales(modelo, objetos):
+    return JSONResponse(jsonable_encoder([modelo.model_validate(o) for o in objetos])).body
+
+
+#Crea una BD temporal con numeros grandes y pequenos, caracteres no ASCII
+#y enlaces agregados fuera del orden de los ids.
+@pytest.fixture
+def db(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'prueba.db'}")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        categorias = [
+            Categoria(nombre="Frágil", descripcion="Vidrio y cerámica"),
+            Categoria(nombre="Peligroso"),
+            Categoria(nombre="Ciencias", descripcion="Cosas de ciencia"),
+        ]
+        items = [
+            Item(id=1, ganancia=150.0, peso=15.0),
+            Item(id=2, ganancia=1e16, peso=0.5),
+            Item(id=3, ganancia=2.5e-07, peso=1e-05),
+            Item(id=4, ganancia=-1.2345678901234568e+17, peso=0.0001),
+            Item(id=5, ganancia=35.0, peso=200.0),
+        ]
+        items[0].categorias = [categorias[2], categorias[0]]
+        items[1].categorias = [categorias[1]]
+        items[3].categorias = [categorias[2], categorias[1], categorias[0]]
+        envios = [
+            Envio(destino="ESCOM", items=[items[4], items[0], items[2]]),
+            Envio(destino="Ciudad Universitaria", items=[items[3], items[1]]),
+            Envio(destino="Vacío"),
+        ]
+        session.add_all(envios)
+        session.commit()
+    with Session(engine) as session:
+        yield session
+
+
+def test_lista_de_items(db):
+    esperado = _bytes_originales(ItemOut, db.exec(select(Item)).all())
+    assert RespuestaORJSON(items_como_dict(db)).body == esperado
+
+
+def test_item_por_id(db):
+    for item in db.exec(select(Item)).all():
+        esperado = JSONResponse(jsonable_encoder(ItemOut.model_validate(item))).body
+        assert RespuestaORJSON(items_como_dict(db, [item.id])[0]).body == esperado
+
+
+def test_lista_de_envios(db):
+    esperado = _bytes_originales(EnvioOut, db.exec(select(Envio)).all())
+    assert RespuestaORJSON(envios_como_dict(db)).body == esperado
+
+
+def test_envio_por_id(db):
+    for envio in db.exec(select(Envio)).all():
+        esperado = JSONResponse(jsonable_encoder(EnvioOut.model_validate(envio))).body
+        assert RespuestaORJSON(envios_como_dict(db, [envio.id])[0]).body == esperado
+
+
+#Los enlaces se agregaron fuera del orden de los ids; el envio debe conservar el orden original.
+def test_orden_de_items_en_envio(db):
+    envio = envios_como_dict(db, [1])[0]
+    assert [item["id"] for item in envio["items"]] == [5, 1, 3]
+
+
+#Los numeros que orjson escribe distinto deben salir igual que con el modulo json.
+@pytest.mark.parametrize("numero", [1e16, -1.5e+22, 1e-05, 2.5e-07, 0.0001, 150.0, 5e-324])
+def test_numeros_extremos(numero):
+    contenido = {"ganancia": numero, "lista": [numero], "texto": "1e5 ,0.00001"}
+    assert RespuestaORJSON(contenido).body == JSONResponse(contenido).body
@@ -1,7 +1,8 @@
-from fastapi import APIRouter, HTTPException, status
-from Servicios.base_Datos import SessionDep
+from fastapi import APIRouter, HTTPException, Request, Response, status
+from Servicios.base_Datos import SessionDep, SessionEscrituraDep, con_reintentos
 from Modelos.modelos import Categoria
 from Esquemas.esquemas import CategoriaCreate, CategoriaOut, CategoriaUpdate
+from Servicios.cache_Http import version_categorias, cabeceras_cache, respuesta_no_modificada, marcar_modificado
 from typing import List
 
 router = APIRouter(prefix="/categorias", tags=["Categorías"])
@@ -9,7 +10,8 @@ router = APIRouter(prefix="/categorias", tags=["Categorías"])
 #Define el endpoint POST para crear una nueva categoria.
 @router.post("/categorias/", response_model=CategoriaOut, status_code=status.HTTP_201_CREATED, tags=["Categorías"])
 #Define la funcion que maneja el endpoint, recibiendo los datos (categoria) y la sesion (db).
-def create_categoria(categoria: CategoriaCreate, db: SessionDep):
+@con_reintentos("El nombre de la categoría ya existe")
+def create_categoria(categoria: CategoriaCreate, db: SessionEscrituraDep):
     """Crea una nueva categoría (Frágil, Peligroso, etc.)."""
     
     #Busca en la BD si ya existe una categoria con el mismo nombre.
@@ -31,8 +33,16 @@ def create_categoria(categoria: CategoriaCreate, db: SessionDep):
 
 #Define el endpoint GET para obtener una lista de todas las categorias.
 @router.get("/categorias/", response_model=List[CategoriaOut], tags=["Categorías"])
-def get_all_categorias(db: SessionDep):
+def get_all_categorias(request: Request, response: Response, db: SessionDep):
     """Obtiene la lista de todas las categorías."""
+    #Calcula el ETag con las versiones de las categorias.
+    etag, modificado = version_categorias(db)
+    #Si el cliente ya tiene esta version, responde 304 sin contenido.
+    no_modificada = respuesta_no_modificada(request, etag, modificado)
+    if no_modificada:
+        return no_modificada
+    #Agrega las cabeceras de cache a la respuesta.
+    response.headers.update(cabeceras_cache(etag, modificado))
     #Realiza una consulta para seleccionar todas las entradas de la tabla Categoria.
     categorias = db.query(Categoria).all()
     #Devuelve la lista de categorias.
@@ -40,8 +50,20 @@ def get_all_categorias(db: SessionDep):
 
 #Define el endpoint GET para obtener una categoria especifica por su ID.
 @router.get("/categorias/{categoria_id}", response_model=CategoriaOut, tags=["Categorías"])
-def get_categoria_by_id(categoria_id: int, db: SessionDep):
+def get_categoria_by_id(categoria_id: int, request: Request, response: Response, db: SessionDep):
     """Obtiene una categoría específica por su ID."""
+    #Calcula el ETag con la version de la categoria.
+    version = version_categorias(db, categoria_id)
+    #Si no se encuentra la categoria, lanza un error HTTP 404 (No Encontrado).
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Categoría no encontrada")
+    etag, modificado = version
+    #Si el cliente ya tiene esta version, responde 304 sin contenido.
+    no_modificada = respuesta_no_modificada(request, etag, modificado)
+    if no_modificada:
+        return no_modificada
+    #Agrega las cabeceras de cache a la respuesta.
+    response.headers.update(cabeceras_cache(etag, modificado))
     #Busca la categoria por su clave primaria (ID).
     categoria = db.get(Categoria, categoria_id)
     #Si no se encuentra la categoria, lanza un error HTTP 404 (No Encontrado).
@@ -52,7 +74,8 @@ def get_categoria_by_id(categoria_id: int, db: SessionDep):
 
 #Define el endpoint PATCH para actualizar parcialmente una categoria.
 @router.patch("/categorias/{categoria_id}", response_model=CategoriaOut, tags=["Categorías"])
-def update_categoria(categoria_id: int, categoria_data: CategoriaUpdate, db: SessionDep):
+@con_reintentos("El nombre de la categoría ya existe")
+def update_categoria(categoria_id: int, categoria_data: CategoriaUpdate, db: SessionEscrituraDep):
     """Actualiza el nombre o descripción de una categoría."""
     #Obtiene la categoria de la BD que se va a actualizar.
     db_categoria = db.get(Categoria, categoria_id)
@@ -76,6 +99,8 @@ def update_categoria(categoria_id: int, categoria_data: CategoriaUpdate, db: Ses
     #Itera sobre los datos de actualizacion y los aplica al objeto de la BD.
     for key, value in update_data.items():
         setattr(db_categoria, key, value)
+    #Aumenta la version de la categoria para invalidar su ETag.
+    marcar_modificado(db_categoria)
     
     #Anade el objeto modificado a la sesion.
     db.add(db_categoria)
@@ -88,7 +113,8 @@ def update_categoria(categoria_id: int, categoria_data: CategoriaUpdate, db: Ses
 
 #Define el endpoint DELETE para eliminar una categoria.
 @router.delete("/categorias/{categoria_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Categorías"])
-def delete_categoria(categoria_id: int, db: SessionDep):
+@con_reintentos("No se puede eliminar la categoría, tiene items asociados.")
+def delete_categoria(categoria_id: int, db: SessionEscrituraDep):
     """Elimina una categoría. Falla si hay items usándola."""
     #Busca la categoria que se va a eliminar.
     db_categoria = db.get(Categoria, categoria_id)
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, status
-from Servicios.base_Datos import SessionDep
-from Modelos.modelos import Envio, Item, Categoria
+from fastapi import APIRouter, HTTPException, Request, status
+from Servicios.base_Datos import SessionDep, SessionEscrituraDep, con_reintentos
+from Modelos.modelos import Envio, Item, Categoria, SolucionEnvio
+from sqlmodel import delete
 from Esquemas.esquemas import EnvioCreate, EnvioOut, EnvioUpdate
+from Servicios.serializacion import RespuestaORJSON, envios_como_dict
+from Servicios.cache_Http import version_envios, cabeceras_cache, respuesta_no_modificada, marcar_modificado
 from typing import List
 router = APIRouter(prefix="/envios", tags=["Envíos"])
 
@@ -9,7 +12,8 @@ router = APIRouter(prefix="/envios", tags=["Envíos"])
 
 #Define el endpoint POST para crear un nuevo envio.
 @router.post("/envios/", response_model=EnvioOut, status_code=status.HTTP_201_CREATED, tags=["Envíos"])
-def create_envio(envio_data: EnvioCreate, db: SessionDep):
+@con_reintentos()
+def create_envio(envio_data: EnvioCreate, db: SessionEscrituraDep):
     """Crea un nuevo envío, asociando una lista de IDs de items existentes."""
     #Prepara una lista vacia para los objetos Item.
     items = []
@@ -36,30 +40,46 @@ def create_envio(envio_data: EnvioCreate, db: SessionDep):
     return db_envio
 
 #Define el endpoint GET para obtener una lista de todos los envios.
-@router.get("/envios/", response_model=List[EnvioOut], tags=["Envíos"])
-def get_all_envios(db: SessionDep):
+@router.get("/envios/", response_model=List[EnvioOut], response_class=RespuestaORJSON, tags=["Envíos"])
+def get_all_envios(request: Request, db: SessionDep):
     """Obtiene todos los envíos, incluyendo los items que contiene cada uno."""
-    #Realiza una consulta para obtener todos los envios.
-    #SQLModel carga automaticamente la lista 'items' para el 'EnvioOut'.
-    envios = db.query(Envio).all()
-    #Devuelve la lista de envios.
-    return envios
+    #Calcula el ETag con las versiones de los envios, sus items y categorias, sin armar la respuesta.
+    etag, modificado = version_envios(db)
+    #Si el cliente ya tiene esta version, responde 304 sin contenido.
+    no_modificada = respuesta_no_modificada(request, etag, modificado)
+    if no_modificada:
+        return no_modificada
+    #Consulta los envios, sus items y categorias como tuplas y arma diccionarios con la forma de 'EnvioOut'.
+    envios = envios_como_dict(db)
+    #Devuelve la respuesta serializada directamente, sin revalidar cada envio con Pydantic.
+    return RespuestaORJSON(envios, headers=cabeceras_cache(etag, modificado))
 
 #Define el endpoint GET para obtener un envio especifico por su ID.
-@router.get("/envios/{envio_id}", response_model=EnvioOut, tags=["Envíos"])
-def get_envio_by_id(envio_id: int, db: SessionDep):
+@router.get("/envios/{envio_id}", response_model=EnvioOut, response_class=RespuestaORJSON, tags=["Envíos"])
+def get_envio_by_id(envio_id: int, request: Request, db: SessionDep):
     """Obtiene un envío específico por ID, incluyendo sus items."""
-    #Busca el envio en la BD por su clave primaria.
-    envio = db.get(Envio, envio_id)
+    #Calcula el ETag con la version del envio, de sus items y de sus categorias.
+    version = version_envios(db, envio_id)
     #Si no se encuentra, lanza un error 404.
-    if not envio:
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Envío no encontrado")
+    etag, modificado = version
+    #Si el cliente ya tiene esta version, responde 304 sin contenido.
+    no_modificada = respuesta_no_modificada(request, etag, modificado)
+    if no_modificada:
+        return no_modificada
+    #Busca el envio en la BD por su ID y lo arma como diccionario.
+    envios = envios_como_dict(db, [envio_id])
+    #Si no se encuentra, lanza un error 404.
+    if not envios:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Envío no encontrado")
     #Devuelve el envio encontrado.
-    return envio
+    return RespuestaORJSON(envios[0], headers=cabeceras_cache(etag, modificado))
 
 #Define el endpoint PATCH para actualizar parcialmente un envio.
 @router.patch("/envios/{envio_id}", response_model=EnvioOut, tags=["Envíos"])
-def update_envio(envio_id: int, envio_data: EnvioUpdate, db: SessionDep):
+@con_reintentos()
+def update_envio(envio_id: int, envio_data: EnvioUpdate, db: SessionEscrituraDep):
     """Actualiza un envío (destino y/o la lista completa de items que contiene)."""
     #Busca el envio en la BD que se va a actualizar.
     db_envio = db.get(Envio, envio_id)
@@ -93,6 +113,8 @@ def update_envio(envio_id: int, envio_data: EnvioUpdate, db: SessionDep):
     #Actualiza los atributos restantes (solo 'destino') en el objeto.
     for key, value in update_data.items():
         setattr(db_envio, key, value)
+    #Aumenta la version del envio para invalidar su ETag.
+    marcar_modificado(db_envio)
         
     #Guarda los cambios en la sesion y en la BD.
     db.add(db_envio)
@@ -103,7 +125,8 @@ def update_envio(envio_id: int, envio_data: EnvioUpdate, db: SessionDep):
 
 #Define el endpoint DELETE para eliminar un envio.
 @router.delete("/envios/{envio_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Envíos"])
-def delete_envio(envio_id: int, db: SessionDep):
+@con_reintentos()
+def delete_envio(envio_id: int, db: SessionEscrituraDep):
     """Elimina un envío (esto NO elimina los items, solo la asociación en la tabla de enlace)."""
     #Busca el envio que se va a eliminar.
     db_envio = db.get(Envio, envio_id)
@@ -111,6 +134,8 @@ def delete_envio(envio_id: int, db: SessionDep):
     if not db_envio:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Envío no encontrado")
         
+    #Borra tambien la solucion guardada del optimizador que hace referencia a este registro.
+    db.exec(delete(SolucionEnvio).where(SolucionEnvio.envio_id == envio_id))
     #Al borrar el Envio, SQLModel elimina automaticamente las filas en 'ItemEnvio'.
     db.delete(db_envio)
     #Confirma la eliminacion.
@@ -1,7 +1,10 @@
-from fastapi import APIRouter, HTTPException, status
-from Servicios.base_Datos import SessionDep
-from Modelos.modelos import Item, Categoria, Envio
+from fastapi import APIRouter, HTTPException, Request, status
+from Servicios.base_Datos import SessionDep, SessionEscrituraDep, con_reintentos
+from Modelos.modelos import Item, Categoria, Envio, SolucionEnvio
+from sqlmodel import delete
 from Esquemas.esquemas import ItemCreate, ItemOut, ItemUpdate
+from Servicios.serializacion import RespuestaORJSON, items_como_dict
+from Servicios.cache_Http import version_items, cabeceras_cache, respuesta_no_modificada, marcar_modificado
 from typing import List
 
 router = APIRouter(prefix="/items", tags=["Items"])
@@ -9,7 +12,8 @@ router = APIRouter(prefix="/items", tags=["Items"])
 
 #Define el endpoint POST para crear un nuevo item.
 @router.post("/items/", response_model=ItemOut, status_code=status.HTTP_201_CREATED, tags=["Items"])
-def create_item(item_data: ItemCreate, db: SessionDep):
+@con_reintentos()
+def create_item(item_data: ItemCreate, db: SessionEscrituraDep):
     """Crea un nuevo item, asignándolo a una o más categorías existentes por nombre."""
     
     #Crea una lista vacia para almacenar los objetos Categoria encontrados.
@@ -41,30 +45,46 @@ def create_item(item_data: ItemCreate, db: SessionDep):
     return new_item
 
 #Define el endpoint GET para obtener una lista de todos los items.
-@router.get("/items/", response_model=List[ItemOut], tags=["Items"])
-def get_all_items(db: SessionDep):
+@router.get("/items/", response_model=List[ItemOut], response_class=RespuestaORJSON, tags=["Items"])
+def get_all_items(request: Request, db: SessionDep):
     """Obtiene todos los items y la información de sus categorías."""
-    #Realiza una consulta para obtener todos los items.
-    #SQLModel se encarga de cargar las relaciones (categorias) necesarias para el 'ItemOut'.
-    items=db.query(Item).all()
-    #Devuelve la lista de items.
-    return items
+    #Calcula el ETag con las versiones de los items y categorias, sin armar la respuesta.
+    etag, modificado = version_items(db)
+    #Si el cliente ya tiene esta version, responde 304 sin contenido.
+    no_modificada = respuesta_no_modificada(request, etag, modificado)
+    if no_modificada:
+        return no_modificada
+    #Consulta los items y sus categorias como tuplas y arma los diccionarios con la forma de 'ItemOut'.
+    items=items_como_dict(db)
+    #Devuelve la respuesta serializada directamente, sin revalidar cada item con Pydantic.
+    return RespuestaORJSON(items, headers=cabeceras_cache(etag, modificado))
 
 #Define el endpoint GET para obtener un item especifico por su ID.
-@router.get("/items/{item_id}", response_model=ItemOut, tags=["Items"])
-def get_item_by_id(item_id: int, db: SessionDep):
+@router.get("/items/{item_id}", response_model=ItemOut, response_class=RespuestaORJSON, tags=["Items"])
+def get_item_by_id(item_id: int, request: Request, db: SessionDep):
     """Obtiene un item por su ID y la información de sus categorías."""
-    #Busca el item en la BD por su clave primaria.
-    item=db.get(Item, item_id)
+    #Calcula el ETag con la version del item y de sus categorias.
+    version = version_items(db, item_id)
     #Si no se encuentra el item, lanza un error 404.
-    if not item :
+    if version is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item no encontrado")
+    etag, modificado = version
+    #Si el cliente ya tiene esta version, responde 304 sin contenido.
+    no_modificada = respuesta_no_modificada(request, etag, modificado)
+    if no_modificada:
+        return no_modificada
+    #Busca el item en la BD por su ID y lo arma como diccionario.
+    items=items_como_dict(db, [item_id])
+    #Si no se encuentra el item, lanza un error 404.
+    if not items :
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item no encontrado")
     #Devuelve el item encontrado.
-    return item
+    return RespuestaORJSON(items[0], headers=cabeceras_cache(etag, modificado))
 
 #Define el endpoint PATCH para actualizar parcialmente un item.
 @router.patch("/items/{item_id}", response_model=ItemOut, tags=["Items"])
-def update_item_partially(item_id: int, item_update: ItemUpdate, db: SessionDep):
+@con_reintentos()
+def update_item_partially(item_id: int, item_update: ItemUpdate, db: SessionEscrituraDep):
     """Actualiza parcialmente un item (peso, ganancia o lista de categorías por nombre)."""
     #Busca el item en la BD que se va a actualizar.
     db_item=db.get(Item, item_id)
@@ -98,6 +118,8 @@ def update_item_partially(item_id: int, item_update: ItemUpdate, db: SessionDep)
     #Actualiza los atributos restantes (peso, ganancia) en el objeto.
     for key, value in update_data.items():
         setattr(db_item, key, value)
+    #Aumenta la version del item para invalidar su ETag.
+    marcar_modificado(db_item)
 
     #Guarda los cambios en la sesion y en la BD.
     db.add(db_item)
@@ -108,7 +130,8 @@ def update_item_partially(item_id: int, item_update: ItemUpdate, db: SessionDep)
 
 #Define el endpoint DELETE para eliminar un item.
 @router.delete("/items/{item_id}", status_code=status.HTTP_204_NO_CONTENT, tags=["Items"])
-def delete_item(item_id: int, db: SessionDep):
+@con_reintentos()
+def delete_item(item_id: int, db: SessionEscrituraDep):
     """Elimina un item (esto lo quitará también de cualquier envío y categoría)."""
     #Busca el item que se va a eliminar.
     item_to_delete = db.get(Item, item_id)
@@ -116,6 +139,8 @@ def delete_item(item_id: int, db: SessionDep):
     if not item_to_delete:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Item no encontrado")
     
+    #Borra tambien la solucion guardada del optimizador que hace referencia a este registro.
+    db.exec(delete(SolucionEnvio).where(SolucionEnvio.item_id == item_id))
     #SQLModel elimina automaticamente las referencias en las tablas de enlace ('ItemEnvio', 'ItemCategoria').
     db.delete(item_to_delete)
     #Confirma la eliminacion en la BD.
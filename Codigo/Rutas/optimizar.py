@@ -1,85 +1,203 @@
+import json
+from typing import Optional
 from fastapi import APIRouter, HTTPException, Query
-from Servicios.base_Datos import engine
-from sqlmodel import Session
-from Modelos.modelos import Envio
-from Servicios.algoritmo_Genetico import AlgoritmoGenetico, SeleccionRuleta, SeleccionTorneo
+from fastapi.responses import StreamingResponse
+from Servicios.base_Datos import SessionDep, escribir
+from Servicios.datos_Optimizador import vectores_envio
+from Servicios.serializacion import categorias_por_item
+from sqlmodel import select, delete
+from Modelos.modelos import Envio, SolucionEnvio
 router = APIRouter(prefix="/optimizar", tags=["Optimización"])
 
 
+#Crea el AlgoritmoGenetico con el metodo de seleccion indicado por el parametro 'metodo'.
+#El modulo del algoritmo se importa aqui (en el primer uso) y no al inicio del archivo,
+#para que el arranque de la API no tenga que cargar el optimizador.
+def _crear_algoritmo(metodo, pesos, ganancias, capacidad, **parametros):
+    from Servicios.algoritmo_Genetico import AlgoritmoGenetico, SeleccionRuleta, SeleccionTorneo
+    # Selección según parámetro recibido
+    if metodo == "ruleta":
+        seleccion = SeleccionRuleta()
+    else:
+        seleccion = SeleccionTorneo()
+    return AlgoritmoGenetico(pesos, ganancias, capacidad, seleccion, **parametros)
+
+
+#Decide si se arranca desde la solucion guardada del envio.
+#Cada optimizacion reemplaza la solucion guardada, asi que con 'seed' no se reutiliza (salvo que se pida
+#explicitamente): dos llamadas con la misma semilla deben partir de la misma poblacion.
+#Si se pide reutilizar=true junto con 'seed', el resultado solo se reproduce con la misma solucion guardada.
+def _debe_reutilizar(reutilizar, seed):
+    if reutilizar is None:
+        return seed is None
+    return reutilizar
+
+
+#Obtiene la solucion guardada del envio y la acomoda a la lista actual de items.
+#Los items nuevos (sin solucion previa) empiezan en 0. Devuelve None si no hay solucion guardada.
+def _cargar_solucion_previa(session, envio_id, item_ids):
+    filas = session.exec(
+        select(SolucionEnvio.item_id, SolucionEnvio.seleccionado).where(SolucionEnvio.envio_id == envio_id)
+    ).all()
+    if not filas:
+        return None
+    previa = dict(filas)
+    return [1 if previa.get(item_id) else 0 for item_id in item_ids]
+
+
+#Reemplaza la solucion guardada del envio por la nueva mejor solucion, indexada por ID de item.
+def _guardar_solucion(session, envio_id, item_ids, genes):
+    session.exec(delete(SolucionEnvio).where(SolucionEnvio.envio_id == envio_id))
+    for item_id, gen in zip(item_ids, genes):
+        session.add(SolucionEnvio(envio_id=envio_id, item_id=item_id, seleccionado=gen == 1))
+    session.commit()
+
+
 #Define el endpoint POST para ejecutar el algoritmo genetico sobre un envio.
 @router.post("/optimizar/{envio_id}")
 def optimizar_envio(
     envio_id: int,
+    db: SessionDep,
+    capacidad: float = Query(..., descripcion="Capacidad máxima del envio"),
+    generaciones: int = Query(30, ge=1, descripcion="Número de generaciones"),
+    poblacion: int = Query(10, ge=1, descripcion="Tamaño de la población"),
+    prob_mutacion: float = Query(0.05, ge=0, le=1, descripcion="Probabilidad de mutacion"),
+    metodo: str = Query("ruleta", pattern="^(ruleta|torneo)$", descripcion="Método de seleccion"),
+    seed: Optional[int] = Query(None, descripcion="Semilla para reproducir la ejecucion (con reutilizar=true, solo se reproduce si la solucion guardada es la misma)"),
+    reutilizar: Optional[bool] = Query(None, descripcion="Partir de la ultima solucion guardada del envio (por defecto, solo si no se envia 'seed')"),
+    prop_previa: float = Query(0.5, ge=0, le=1, descripcion="Proporcion de la poblacion inicial que parte de la solucion previa"),
+    prop_voraz: float = Query(0.0, ge=0, le=1, descripcion="Proporcion de la poblacion inicial sembrada con soluciones voraces (ganancia/peso)"),
+    busqueda_local: bool = Query(False, descripcion="Aplica busqueda local (escalada de colinas) a la elite de cada generacion"),
+    num_elite: int = Query(2, ge=1, descripcion="Número de sujetos de la elite que se mejoran con busqueda local")
+):
+    #Obtiene el envio por su ID usando la sesion.
+    envio = db.get(Envio, envio_id)
+    #Si no se encuentra el envio, lanza un error 404.
+    if not envio:
+        raise HTTPException(status_code=404, detail="Envio no encontrado")
+
+    #Obtiene los IDs, pesos y ganancias de los items del envio desde la matriz compartida del optimizador.
+    item_ids, pesos, ganancias = vectores_envio(db, envio_id)
+    #Si el envio no tiene items, lanza un error 400.
+    if not item_ids:
+        raise HTTPException(status_code=400, detail="Este envio no tiene items")
+
+    #Si se pidio, busca la solucion anterior del envio para arrancar en caliente.
+    genes_previos = _cargar_solucion_previa(db, envio_id, item_ids) if _debe_reutilizar(reutilizar, seed) else None
+
+    #Crea una instancia del AlgoritmoGenetico con los datos y el metodo de seleccion.
+    ag = _crear_algoritmo(metodo, pesos, ganancias, capacidad, generaciones=generaciones, num_individuos=poblacion, prob_mutacion=prob_mutacion, seed=seed,
+                          genes_previos=genes_previos, prop_previa=prop_previa, prop_voraz=prop_voraz,
+                          busqueda_local=busqueda_local, num_elite=num_elite)
+    
+    #Ejecuta el algoritmo, que devuelve el mejor 'Sujeto' (la mejor solucion).
+    mejor_solucion = ag.ejecutar()
+
+    #Guarda la mejor solucion valida para reutilizarla en la siguiente optimizacion.
+    #Se usa una sesion de escritura aparte (con reintentos), asi la lectura no retiene el bloqueo de escritura durante el algoritmo.
+    if mejor_solucion.aptitud > 0:
+        escribir(lambda session: _guardar_solucion(session, envio_id, item_ids, mejor_solucion.genes))
+
+    #Obtiene la lista de genes (ej. [1, 0, 1]) del mejor sujeto.
+    mejor_genes_lista = mejor_solucion.genes
+
+    #Obtiene la ganancia total, que es la aptitud (fitness) del mejor sujeto.
+    ganancia_total = mejor_solucion.aptitud
+
+    #Calcula el peso total de la solucion seleccionada.
+    peso_total = sum(pesos[i] for i, gen in enumerate(mejor_genes_lista) if gen == 1)
+
+    #Carga en una sola consulta las categorias de los items seleccionados.
+    seleccionados = [i for i, gen in enumerate(mejor_genes_lista) if gen == 1]
+    categorias = categorias_por_item(db, [item_ids[i] for i in seleccionados])
+
+    #Construye la lista de los items que fueron seleccionados por el algoritmo.
+    items_seleccionados = [
+        #Crea un diccionario por cada item seleccionado.
+        {
+            "indice": i,
+            "id": item_ids[i],
+            #Obtiene los nombres de las categorias del item.
+            "nombres_categorias": [cat["nombre"] for cat in categorias[item_ids[i]]],
+            "peso": pesos[i],
+            "ganancia": ganancias[i],
+        }
+        #Itera sobre los indices de los genes en 1.
+        for i in seleccionados
+    ]
+
+    #Devuelve la respuesta final en formato JSON.
+    return {
+        "envio_id": envio.id,
+        "destino": envio.destino,
+        "mejor_genes": mejor_genes_lista,
+        "ganancia_total": ganancia_total,
+        "peso_total": peso_total,
+        "items_seleccionados": items_seleccionados,
+    }
+
+
+#Define el endpoint GET que ejecuta el algoritmo genetico y envia el progreso como Server-Sent Events.
+@router.get("/optimizar/{envio_id}/stream")
+def optimizar_envio_stream(
+    envio_id: int,
+    db: SessionDep,
     capacidad: float = Query(..., descripcion="Capacidad máxima del envio"),
     generaciones: int = Query(30, ge=1, descripcion="Número de generaciones"),
     poblacion: int = Query(10, ge=1, descripcion="Tamaño de la población"),
     prob_mutacion: float = Query(0.05, ge=0, le=1, descripcion="Probabilidad de mutacion"),
-    metodo: str = Query("ruleta", pattern="^(ruleta|torneo)$", descripcion="Método de seleccion")
+    metodo: str = Query("ruleta", pattern="^(ruleta|torneo)$", descripcion="Método de seleccion"),
+    seed: Optional[int] = Query(None, descripcion="Semilla para reproducir la ejecucion (con reutilizar=true, solo se reproduce si la solucion guardada es la misma)"),
+    reutilizar: Optional[bool] = Query(None, descripcion="Partir de la ultima solucion guardada del envio (por defecto, solo si no se envia 'seed')"),
+    prop_previa: float = Query(0.5, ge=0, le=1, descripcion="Proporcion de la poblacion inicial que parte de la solucion previa"),
+    prop_voraz: float = Query(0.0, ge=0, le=1, descripcion="Proporcion de la poblacion inicial sembrada con soluciones voraces (ganancia/peso)"),
+    busqueda_local: bool = Query(False, descripcion="Aplica busqueda local (escalada de colinas) a la elite de cada generacion"),
+    num_elite: int = Query(2, ge=1, descripcion="Número de sujetos de la elite que se mejoran con busqueda local")
 ):
-    #Maneja la sesion de BD manualmente para esta operacion.
-    with Session(engine) as session:
-        #Obtiene el envio por su ID usando la sesion.
-        envio = session.get(Envio, envio_id)
-        #Si no se encuentra el envio, lanza un error 404.
-        if not envio:
-            raise HTTPException(status_code=404, detail="Envio no encontrado")
-
-        #Obtiene la lista de items directamente desde la relacion del envio.
-        items = envio.items
-        #Si el envio no tiene items, lanza un error 400.
-        if not items:
-            raise HTTPException(status_code=400, detail="Este envio no tiene items")
-
-        #Prepara la lista de pesos para el algoritmo genetico.
-        pesos = [i.peso for i in items]
-        #Prepara la lista de ganancias para el algoritmo genetico.
-        ganancias = [i.ganancia for i in items]
-
-         # Selección según parámetro recibido
-        if metodo == "ruleta":
-            seleccion = SeleccionRuleta()
-        else:
-            seleccion = SeleccionTorneo()
-
-        #Crea una instancia del AlgoritmoGenetico con los datos y el metodo de seleccion.
-        ag = AlgoritmoGenetico(pesos, ganancias, capacidad, seleccion, generaciones=generaciones, num_individuos=poblacion, prob_mutacion=prob_mutacion)
-        
-        #Ejecuta el algoritmo, que devuelve el mejor 'Sujeto' (la mejor solucion).
-        mejor_solucion = ag.ejecutar()
-
-        #Obtiene la lista de genes (ej. [1, 0, 1]) del mejor sujeto.
-        mejor_genes_lista = mejor_solucion.genes
-
-        #Obtiene la ganancia total, que es la aptitud (fitness) del mejor sujeto.
-        ganancia_total = mejor_solucion.aptitud
-
-        #Calcula el peso total de la solucion seleccionada.
-        peso_total = sum(pesos[i] for i, gen in enumerate(mejor_genes_lista) if gen == 1)
-
-        #Construye la lista de los items que fueron seleccionados por el algoritmo.
-        items_seleccionados = [
-            #Crea un diccionario por cada item seleccionado.
-            {
-                "indice": i,
-                "id": items[i].id,
-                #Obtiene los nombres de las categorias del item.
-                "nombres_categorias": [cat.nombre for cat in items[i].categorias] if items[i].categorias else [],
-                "peso": items[i].peso,
-                "ganancia": items[i].ganancia,
+    """Ejecuta el algoritmo genético enviando el mejor resultado de cada generación como evento SSE."""
+    #Carga los datos del envio antes de empezar; el streaming ya no usa esta sesion.
+    envio = db.get(Envio, envio_id)
+    #Si no se encuentra el envio, lanza un error 404.
+    if not envio:
+        raise HTTPException(status_code=404, detail="Envio no encontrado")
+    #Obtiene los IDs, pesos y ganancias de los items desde la matriz compartida del optimizador.
+    item_ids, pesos, ganancias = vectores_envio(db, envio_id)
+    #Si el envio no tiene items, lanza un error 400.
+    if not item_ids:
+        raise HTTPException(status_code=400, detail="Este envio no tiene items")
+    #Si se pidio, busca la solucion anterior del envio para arrancar en caliente.
+    genes_previos = _cargar_solucion_previa(db, envio_id, item_ids) if _debe_reutilizar(reutilizar, seed) else None
+
+    #Crea el algoritmo con su propio generador aleatorio (y semilla, si se envio).
+    ag = _crear_algoritmo(metodo, pesos, ganancias, capacidad, generaciones=generaciones, num_individuos=poblacion, prob_mutacion=prob_mutacion, seed=seed,
+                          genes_previos=genes_previos, prop_previa=prop_previa, prop_voraz=prop_voraz,
+                          busqueda_local=busqueda_local, num_elite=num_elite)
+
+    #Generador de eventos: uno por generacion y un evento final con el resultado.
+    #Si el cliente deja de leer, el algoritmo se detiene en la siguiente generacion.
+    def eventos():
+        mejor_global = None
+        for gen, mejor, mejor_global in ag.ejecutar_por_generacion():
+            datos = {
+                "generacion": gen,
+                "mejor_aptitud": mejor.aptitud,
+                "mejor_genes": mejor.genes,
+                "mejor_aptitud_global": mejor_global.aptitud,
             }
-            #Itera sobre la lista de genes.
-            for i, gen in enumerate(mejor_genes_lista)
-            #Incluye el item solo si el gen es 1.
-            if gen == 1
-        ]
-
-        #Devuelve la respuesta final en formato JSON.
-        return {
-            "envio_id": envio.id,
-            "destino": envio.destino,
-            "mejor_genes": mejor_genes_lista,
-            "ganancia_total": ganancia_total,
-            "peso_total": peso_total,
-            "items_seleccionados": items_seleccionados,
+            yield f"event: generacion\ndata: {json.dumps(datos)}\n\n"
+
+        #Guarda la mejor solucion valida para reutilizarla en la siguiente optimizacion.
+        if mejor_global.aptitud > 0:
+            escribir(lambda session: _guardar_solucion(session, envio_id, item_ids, mejor_global.genes))
+
+        #Evento final con la mejor solucion encontrada.
+        resultado = {
+            "envio_id": envio_id,
+            "mejor_genes": mejor_global.genes,
+            "ganancia_total": mejor_global.aptitud,
+            "peso_total": sum(pesos[i] for i, gen in enumerate(mejor_global.genes) if gen == 1),
+            "item_ids_seleccionados": [item_ids[i] for i, gen in enumerate(mejor_global.genes) if gen == 1],
         }
-    
+        yield f"event: resultado\ndata: {json.dumps(resultado)}\n\n"
+
+    return StreamingResponse(eventos(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
@@ -7,11 +7,21 @@
 #Librerias a utilizar 
 #Random sirve para utilizar funciones aleatorias
 import random
+#Bisect sirve para insertar en listas ordenadas (se usa en la busqueda local)
+import bisect
 #Nos permite crear interfaces en Python
 from abc import ABC, abstractmethod
 
 #Interface utilizada para el cambio de metodo de seleccion
+#Cada metodo tiene su propio generador aleatorio para no compartir estado entre ejecuciones
 class MetodoSeleccion(ABC):
+    def __init__(self, rng=None):
+        self.rng = rng if rng is not None else random.Random()
+
+    #Permite que el algoritmo le asigne su generador (con semilla) al metodo de seleccion
+    def usar_generador(self, rng):
+        self.rng = rng
+
     @abstractmethod
     def seleccionar(self, poblacion):
         pass
@@ -23,9 +33,9 @@ class SeleccionRuleta(MetodoSeleccion):
         #Si todo el mundo tiene 0, elige uno al azar 
         total_aptitud = sum(ind.aptitud for ind in poblacion.sujetos)
         if total_aptitud == 0:
-            return random.choice(poblacion.sujetos)
+            return self.rng.choice(poblacion.sujetos)
         #Es momento de girar la ruleta
-        punto = random.uniform(0, total_aptitud)
+        punto = self.rng.uniform(0, total_aptitud)
         acumulado = 0
         for ind in poblacion.sujetos:
             acumulado += ind.aptitud
@@ -35,14 +45,20 @@ class SeleccionRuleta(MetodoSeleccion):
 #Seleccion por torneo
 #Torneo es el metodo de seleccion más rapido de hacer, se recomienda utilizar el metodo de ruleta
 class SeleccionTorneo(MetodoSeleccion):
-    def __init__(self, k=3):
+    def __init__(self, k=3, rng=None):
+        super().__init__(rng)
         #En caso de generar un error la seleccion, se pasara a utilizar ruleta
         self.k = k
-        self.fallback = SeleccionRuleta()  #Ruleta como respaldo
+        self.fallback = SeleccionRuleta(self.rng)  #Ruleta como respaldo
+
+    #La ruleta de respaldo usa el mismo generador que el torneo
+    def usar_generador(self, rng):
+        super().usar_generador(rng)
+        self.fallback.usar_generador(rng)
 
     def seleccionar(self, poblacion):
         #Elige k indivudos al azar y se queda con el mejor
-        participantes = random.sample(poblacion.sujetos, min(self.k, len(poblacion.sujetos)))
+        participantes = self.rng.sample(poblacion.sujetos, min(self.k, len(poblacion.sujetos)))
         if all(ind.aptitud == 0 for ind in participantes):
             #Si todos son inválidos, usamos ruleta
             return self.fallback.seleccionar(poblacion)
@@ -51,9 +67,9 @@ class SeleccionTorneo(MetodoSeleccion):
 #Clase sujeto
 #Son las posibles soluciones al problema de la mochila
 class Sujetos:
-    def __init__(self, num_objetos):
+    def __init__(self, num_objetos, rng=random):
         #Lista de 0 y 1 
-        self.genes = [random.randint(0, 1) for _ in range(num_objetos)]
+        self.genes = [rng.randint(0, 1) for _ in range(num_objetos)]
         #Valor total de la combinacion
         self.aptitud = 0
 
@@ -75,9 +91,9 @@ class Sujetos:
 
 #Clase de la poblacion 
 class Poblacion:
-    def __init__(self, num_individuos, num_objetos):
+    def __init__(self, num_individuos, num_objetos, rng=random):
         #Crea una lista con los genes aleatorios
-        self.sujetos = [Sujetos(num_objetos) for _ in range(num_individuos)]
+        self.sujetos = [Sujetos(num_objetos, rng) for _ in range(num_individuos)]
     #Evalua la aptitud de cada individuo con respecto al problema de la mochila.
     def evaluar(self, pesos, valores, capacidad):
         for ind in self.sujetos:
@@ -87,9 +103,13 @@ class Poblacion:
 #Se controla todo el proceso de seleccion, crice, mutuacion y generaciones
 class AlgoritmoGenetico:
     def __init__(self, pesos, valores, capacidad, estrategia_seleccion,
-                 num_individuos=20, generaciones=50, prob_mutacion=0.01):
+                 num_individuos=20, generaciones=50, prob_mutacion=0.01, seed=None,
+                 genes_previos=None, prop_previa=0.5, prop_voraz=0.0,
+                 busqueda_local=False, num_elite=2):
         #Recibe los pesos, valores y capacidad del problema
         #Numero de generaciones y sus propbabilidades de mutar
+        #Con la misma semilla (seed) se obtiene exactamente la misma ejecucion
+        self.rng = random.Random(seed)
         self.pesos = pesos
         self.valores = valores
         self.capacidad = capacidad
@@ -98,8 +118,153 @@ class AlgoritmoGenetico:
         self.generaciones = generaciones
         self.num_individuos = num_individuos
         self.estrategia = estrategia_seleccion
-        self.poblacion = Poblacion(num_individuos, self.num_objetos)
+        self.estrategia.usar_generador(self.rng)
+        #Etapa memetica: mejora con busqueda local a los 'num_elite' mejores de cada generacion
+        self.busqueda_local = busqueda_local
+        self.num_elite = num_elite
+        self.poblacion = Poblacion(num_individuos, self.num_objetos, self.rng)
+        #Objetos ordenados de mayor a menor razon ganancia/peso (se usa en la busqueda local)
+        self.orden_razon = sorted(range(self.num_objetos), key=self._razon, reverse=True)
+        #Cuantos sujetos de la poblacion inicial ya fueron sembrados (no aleatorios)
+        self.num_sembrados = 0
+        #Si hay una solucion anterior, una parte de la poblacion inicial parte de ella
+        if genes_previos is not None:
+            self.sembrar(genes_previos, prop_previa)
+        #Otra parte puede empezar con soluciones voraces por ganancia/peso
+        if prop_voraz > 0:
+            self.sembrar_voraz(prop_voraz)
         self.poblacion.evaluar(self.pesos, self.valores, self.capacidad)
+        self.mejorar_elite()
+
+    #Arranque en caliente: reemplaza una proporcion de la poblacion inicial por copias de una solucion previa
+    #El primer sujeto es la copia exacta y los demas son variaciones (cada gen se invierte con probabilidad 1/n)
+    #El resto de la poblacion se queda aleatoria para no perder diversidad
+    def sembrar(self, genes_previos, proporcion=0.5):
+        prob_cambio = 1 / self.num_objetos if self.num_objetos else 0
+        for k, sujeto in enumerate(self._sujetos_a_sembrar(proporcion)):
+            sujeto.genes = list(genes_previos)
+            if k > 0:
+                for i in range(self.num_objetos):
+                    if self.rng.random() < prob_cambio:
+                        sujeto.genes[i] = 1 - sujeto.genes[i]
+
+    #Siembra voraz: el primer sujeto mete los objetos en orden de mayor ganancia/peso mientras quepan
+    #Los demas son voraces aleatorizados: el orden usa la razon multiplicada por un ruido entre 0.5 y 1.5
+    #Asi la poblacion inicial ya tiene soluciones validas y no se pierden las primeras generaciones
+    def sembrar_voraz(self, proporcion=0.2):
+        razones = [self._razon(i) for i in range(self.num_objetos)]
+        for k, sujeto in enumerate(self._sujetos_a_sembrar(proporcion)):
+            if k == 0:
+                orden = self.orden_razon
+            else:
+                ruido = [self.rng.uniform(0.5, 1.5) for _ in range(self.num_objetos)]
+                orden = sorted(range(self.num_objetos), key=lambda i: razones[i] * ruido[i], reverse=True)
+            sujeto.genes = self._llenar_voraz(orden)
+
+    #Regresa los siguientes sujetos de la poblacion inicial que aun no han sido sembrados
+    #Con una proporcion de 0 no se siembra ninguno; con cualquier otra se siembra al menos uno
+    def _sujetos_a_sembrar(self, proporcion):
+        if proporcion <= 0:
+            return []
+        cantidad = max(1, int(self.num_individuos * proporcion))
+        inicio = self.num_sembrados
+        fin = min(self.num_individuos, inicio + cantidad)
+        self.num_sembrados = fin
+        return self.poblacion.sujetos[inicio:fin]
+
+    #Razon ganancia/peso de un objeto (los objetos sin peso van primero)
+    def _razon(self, i):
+        if self.pesos[i] <= 0:
+            return float("inf")
+        return self.valores[i] / self.pesos[i]
+
+    #Mete los objetos en el orden indicado mientras no se pase la capacidad
+    def _llenar_voraz(self, orden):
+        genes = [0] * self.num_objetos
+        peso_total = 0
+        for i in orden:
+            if peso_total + self.pesos[i] <= self.capacidad:
+                genes[i] = 1
+                peso_total += self.pesos[i]
+        return genes
+
+    #Busqueda local (escalada de colinas) sobre un sujeto
+    #Se guardan el peso y valor totales, asi cada movimiento se evalua en O(1):
+    #  - 1-flip: meter un objeto que todavia cabe (delta = +valor)
+    #  - swap: sacar un objeto y meter otro que quepa y valga mas (delta = valor_entra - valor_sale)
+    #Si el sujeto se pasa de la capacidad, primero se reparan sacando los objetos de peor razon
+    #Los objetos de dentro y de fuera se guardan como posiciones en 'orden_razon' (listas ordenadas),
+    #y se actualizan con cada movimiento en lugar de recalcularlas en cada paso.
+    #El swap solo prueba los 'max_candidatos' de peor razon de dentro contra los de mejor razon de fuera,
+    #asi cada paso cuesta O(max_candidatos^2) y no O(n^2)
+    def mejorar(self, sujeto, max_pasos=100, max_candidatos=8):
+        genes = sujeto.genes
+        orden = self.orden_razon
+        dentro = [r for r, i in enumerate(orden) if genes[i] == 1]
+        fuera = [r for r, i in enumerate(orden) if genes[i] == 0]
+        peso_total = sum(self.pesos[orden[r]] for r in dentro)
+        valor_total = sum(self.valores[orden[r]] for r in dentro)
+        #Reparacion de sujetos invalidos (los de peor razon estan al final de 'dentro')
+        while peso_total > self.capacidad and dentro:
+            r = dentro.pop()
+            i = orden[r]
+            genes[i] = 0
+            peso_total -= self.pesos[i]
+            valor_total -= self.valores[i]
+            bisect.insort(fuera, r)
+
+        #Mete todos los objetos de fuera que todavia quepan (en orden de mejor razon)
+        def llenar(peso_total, valor_total):
+            restantes = []
+            for r in fuera:
+                j = orden[r]
+                if self.valores[j] > 0 and peso_total + self.pesos[j] <= self.capacidad:
+                    genes[j] = 1
+                    peso_total += self.pesos[j]
+                    valor_total += self.valores[j]
+                    bisect.insort(dentro, r)
+                else:
+                    restantes.append(r)
+            fuera[:] = restantes
+            return peso_total, valor_total
+
+        peso_total, valor_total = llenar(peso_total, valor_total)
+        #Se aplica el mejor swap entre los candidatos hasta que ya no haya mejoras
+        for _ in range(max_pasos):
+            mejor_delta = 0
+            mejor_par = None
+            for a in range(max(0, len(dentro) - max_candidatos), len(dentro)):
+                i = orden[dentro[a]]
+                for b in range(min(max_candidatos, len(fuera))):
+                    j = orden[fuera[b]]
+                    delta = self.valores[j] - self.valores[i]
+                    if delta > mejor_delta and peso_total - self.pesos[i] + self.pesos[j] <= self.capacidad:
+                        mejor_delta = delta
+                        mejor_par = (a, b)
+            if mejor_par is None:
+                break
+            a, b = mejor_par
+            r_sale = dentro.pop(a)
+            r_entra = fuera.pop(b)
+            i, j = orden[r_sale], orden[r_entra]
+            genes[i], genes[j] = 0, 1
+            peso_total += self.pesos[j] - self.pesos[i]
+            valor_total += mejor_delta
+            bisect.insort(dentro, r_entra)
+            bisect.insort(fuera, r_sale)
+            #Si el swap libero capacidad, pueden caber mas objetos
+            if self.pesos[i] > self.pesos[j]:
+                peso_total, valor_total = llenar(peso_total, valor_total)
+        sujeto.aptitud = valor_total
+        return sujeto
+
+    #Aplica la busqueda local a los mejores sujetos de la poblacion (si esta activada)
+    def mejorar_elite(self):
+        if not self.busqueda_local:
+            return
+        elite = sorted(self.poblacion.sujetos, key=lambda ind: ind.aptitud, reverse=True)[:self.num_elite]
+        for ind in elite:
+            self.mejorar(ind)
 
     #La funcion de cruza utiliza el metodo de cruce por un solo punto
     #No es el mejor para utilizar, ya que debemos tener cuidado de no sobrepasar el limite de la lista
@@ -107,13 +272,13 @@ class AlgoritmoGenetico:
     #Se elige un punto de cruce al azar, y se intercambian los genes de los 2 individuos 
     def crossover(self, padre1, padre2):
         if self.num_objetos < 2:
-            hijo = Sujetos(self.num_objetos)
+            hijo = Sujetos(self.num_objetos, self.rng)
             hijo.genes = padre1.genes.copy()
             return hijo, hijo
         #Se realiza la eleccion del punto de cruce
-        punto = random.randint(1, self.num_objetos - 1)
-        hijo1 = Sujetos(self.num_objetos)
-        hijo2 = Sujetos(self.num_objetos)
+        punto = self.rng.randint(1, self.num_objetos - 1)
+        hijo1 = Sujetos(self.num_objetos, self.rng)
+        hijo2 = Sujetos(self.num_objetos, self.rng)
         hijo1.genes = padre1.genes[:punto] + padre2.genes[punto:]
         hijo2.genes = padre2.genes[:punto] + padre1.genes[punto:]
         return hijo1, hijo2
@@ -122,7 +287,7 @@ class AlgoritmoGenetico:
     #Cada gen tiene probabilidad de cambiar a 0 - 1 o 1 - 0
     def mutacion(self, individuo):
         for i in range(len(individuo.genes)):
-            if random.random() < self.prob_mutacion:
+            if self.rng.random() < self.prob_mutacion:
                 individuo.genes[i] = 1 - individuo.genes[i]
 
     #Podemos usar para hacer la mutacion de un hijo
@@ -132,10 +297,13 @@ class AlgoritmoGenetico:
     #   modificar_indice 
 
 
-    def ejecutar(self):
+    #Ejecuta el algoritmo generacion por generacion
+    #Devuelve (generacion, mejor de la generacion, mejor global) al terminar cada una,
+    #asi quien lo consume puede mostrar el progreso o detenerse antes
+    def ejecutar_por_generacion(self):
         #Se guarda el mejor individuo encontrado en todas las generaciones
-        #Se encuentra vacio al inicio
-        mejor_global = None
+        #Empieza con el mejor de la poblacion inicial (importa cuando la poblacion fue sembrada)
+        mejor_global = max(self.poblacion.sujetos, key=lambda ind: ind.aptitud, default=None)
         #Bucle de generaciones
         for gen in range(1, self.generaciones + 1):
             #Crea una nueva poblacion con los nuevos sujetos (de las generaciones)
@@ -159,12 +327,19 @@ class AlgoritmoGenetico:
             self.poblacion.sujetos = nueva_poblacion
             #Se calcula la nueva aptitud de todos los individuos 
             self.poblacion.evaluar(self.pesos, self.valores, self.capacidad)
+            #Etapa memetica opcional sobre la elite
+            self.mejorar_elite()
             #Guarda al mejor individuo de la poblacion
             mejor = max(self.poblacion.sujetos, key=lambda ind: ind.aptitud)
             #Verifica si el mejor resultado es remplazado por otro mejor
             #Si noe existe aun ese mejor, pues se guarda
             if mejor_global is None or mejor.aptitud > mejor_global.aptitud:
                 mejor_global = mejor
+            yield gen, mejor, mejor_global
+
+    def ejecutar(self):
+        mejor_global = None
+        for gen, mejor, mejor_global in self.ejecutar_por_generacion():
             #Se imprime el mejor gen
             print(f"Generación {gen}: Mejor aptitud = {mejor.aptitud}")
         return mejor_global
@@ -223,14 +398,21 @@ if __name__ == "__main__":
                                   num_individuos=10, generaciones=30, prob_mutacion=0)
     mejor_ruleta = ag_ruleta.ejecutar()
 
+    #Tercer analisis: hibrido (torneo con siembra voraz y busqueda local en la elite)
+    print("\nAnalisis Hibrido (voraz + busqueda local):")
+    ag_hibrido = AlgoritmoGenetico(pesos, valores, capacidad, SeleccionTorneo(k=3),
+                                   num_individuos=10, generaciones=30, prob_mutacion=0.5,
+                                   prop_voraz=0.3, busqueda_local=True)
+    mejor_hibrido = ag_hibrido.ejecutar()
+
     #Comparamos resultados
     print("\n=== Resultados finales ===")
     print("Mejor con Torneo:", mejor_torneo.genes, "Aptitud:", mejor_torneo.aptitud)
     print("Mejor con Ruleta:", mejor_ruleta.genes, "Aptitud:", mejor_ruleta.aptitud)
+    print("Mejor con Hibrido:", mejor_hibrido.genes, "Aptitud:", mejor_hibrido.aptitud)
 
-    if mejor_torneo.aptitud >= mejor_ruleta.aptitud:
-        print("\n>>> El mejor resultado global lo dio: Torneo")
-    else:
-        print("\n>>> El mejor resultado global lo dio: Ruleta")
+    resultados = {"Torneo": mejor_torneo, "Ruleta": mejor_ruleta, "Hibrido": mejor_hibrido}
+    ganador = max(resultados, key=lambda nombre: resultados[nombre].aptitud)
+    print("\n>>> El mejor resultado global lo dio:", ganador)
 
 
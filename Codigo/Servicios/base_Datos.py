@@ -1,23 +1,196 @@
+import functools
+import random
+import time
+from datetime import datetime, timezone
+import anyio
 from sqlmodel import SQLModel, create_engine, Session
+from sqlalchemy import event, text
+from sqlalchemy.exc import IntegrityError, OperationalError
 from typing_extensions import Annotated
-from fastapi import Depends
+from fastapi import Depends, HTTPException, status
 
 #--- Base de Datos ---
 sql_url="sqlite:///database.db"
-engine=create_engine(sql_url)
+#'timeout' es el tiempo (en segundos) que SQLite espera a que se libere un bloqueo antes de fallar.
+#Numero maximo de sesiones abiertas a la vez (igual al grupo de hilos de AnyIO, 40 por defecto).
+#Las peticiones de mas esperan en el ciclo de eventos, antes de abrir su sesion, sin ocupar un hilo ni una conexion.
+MAX_SESIONES = 40
+#Tamano del pool: cada sesion usa a lo mas 2 conexiones a la vez (la suya y, en el optimizador, la de 'escribir'
+#o la de la matriz compartida), asi que 2 * MAX_SESIONES conexiones alcanzan y ninguna ruta se queda esperando una.
+#Sin el limite de sesiones no bastaria: una peticion conserva su conexion mientras espera un hilo para armar la respuesta.
+engine=create_engine(sql_url, connect_args={"timeout": 15}, pool_size=10, max_overflow=2 * MAX_SESIONES - 10)
+#Motor para escrituras: comparte las conexiones con 'engine', pero sus transacciones empiezan con BEGIN IMMEDIATE.
+engine_escritura=engine.execution_options(escritura=True)
+
+#Numero maximo de reintentos cuando la BD esta bloqueada, y esperas (en segundos) del backoff exponencial.
+MAX_REINTENTOS = 5
+ESPERA_INICIAL = 0.05
+ESPERA_MAXIMA = 1.0
+
+#Configura cada conexion nueva a SQLite.
+@event.listens_for(engine, "connect")
+def _al_conectar(conexion_dbapi, registro):
+    #Desactiva el manejo de transacciones del driver para que SQLAlchemy emita su propio BEGIN.
+    conexion_dbapi.isolation_level = None
+    #En modo WAL las lecturas no bloquean a las escrituras (ni al reves).
+    cursor = conexion_dbapi.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+#Inicia cada transaccion. Las de escritura toman el bloqueo de escritura desde el principio (BEGIN IMMEDIATE),
+#asi la lectura y la escritura de una misma operacion (por ejemplo, revisar si existe y luego insertar) no se mezclan
+#con otros escritores, y si la BD esta ocupada el error sale al inicio, donde se puede reintentar sin perder nada.
+@event.listens_for(engine, "begin")
+def _al_iniciar(conexion):
+    if conexion.get_execution_options().get("escritura"):
+        conexion.exec_driver_sql("BEGIN IMMEDIATE")
+    else:
+        conexion.exec_driver_sql("BEGIN")
+
+#Version del esquema de la BD. Se debe incrementar cada vez que se cambien las tablas en 'Modelos'.
+#Se guarda en el 'PRAGMA user_version' de SQLite.
+VERSION_ESQUEMA = 3
+
+#Columnas agregadas en la version 2 del esquema (control de versiones para el cache HTTP).
+#'create_all' no agrega columnas a tablas existentes, asi que se agregan aqui a las BD anteriores.
+_COLUMNAS_VERSION_2 = {
+    "version": "INTEGER NOT NULL DEFAULT 1",
+    "actualizado_en": "DATETIME NOT NULL DEFAULT '{ahora}'",
+}
+
+#Agrega a las tablas 'categoria', 'item' y 'envio' las columnas de la version 2 que les falten.
+def _migrar_a_version_2(conexion):
+    ahora = datetime.now(timezone.utc).replace(tzinfo=None).isoformat(sep=" ")
+    for tabla in ("categoria", "item", "envio"):
+        existentes = {fila[1] for fila in conexion.execute(text(f"PRAGMA table_info({tabla})"))}
+        for columna, definicion in _COLUMNAS_VERSION_2.items():
+            if columna not in existentes:
+                conexion.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {columna} " + definicion.format(ahora=ahora)))
+
+#Version 3: contador de generacion de los datos que usa el optimizador (pesos, ganancias y items de cada envio).
+#Los triggers lo incrementan en cada cambio de 'item' o 'itemenvio', sin importar quien escriba en la BD,
+#asi la matriz compartida del optimizador sabe si esta al dia leyendo un solo renglon.
+_TRIGGERS_GENERACION = {
+    "item_insertar": "AFTER INSERT ON item",
+    "item_borrar": "AFTER DELETE ON item",
+    "item_modificar": "AFTER UPDATE OF peso, ganancia ON item",
+    "itemenvio_insertar": "AFTER INSERT ON itemenvio",
+    "itemenvio_borrar": "AFTER DELETE ON itemenvio",
+    "itemenvio_modificar": "AFTER UPDATE ON itemenvio",
+}
+
+#Crea la tabla 'generacion_datos' (con un solo renglon) y los triggers que la incrementan.
+def _migrar_a_version_3(conexion):
+    conexion.execute(text(
+        "CREATE TABLE IF NOT EXISTS generacion_datos (id INTEGER PRIMARY KEY CHECK (id = 1), generacion INTEGER NOT NULL)"
+    ))
+    conexion.execute(text("INSERT OR IGNORE INTO generacion_datos (id, generacion) VALUES (1, 1)"))
+    for nombre, evento in _TRIGGERS_GENERACION.items():
+        conexion.execute(text(
+            f"CREATE TRIGGER IF NOT EXISTS generacion_{nombre} {evento} "
+            "BEGIN UPDATE generacion_datos SET generacion = generacion + 1 WHERE id = 1; END"
+        ))
 
 #Define una funcion para crear la base de datos y las tablas.
 def create_db_and_tables():
+    with engine.connect() as conexion:
+        #Lee la version del esquema guardada en la BD (0 si es una BD nueva o anterior a este control).
+        version = conexion.execute(text("PRAGMA user_version")).scalar()
+        #Si el esquema ya esta al dia, no es necesario revisar ni crear tablas al arrancar.
+        if version == VERSION_ESQUEMA:
+            return
     #Ordena a SQLModel que cree todas las tablas que heredan de 'SQLModel' (con table=True).
     SQLModel.metadata.create_all(engine)
+    #Guarda la nueva version del esquema.
+    with engine.begin() as conexion:
+        #Las BD creadas antes de la version 2 no tienen las columnas de version.
+        if version < 2:
+            _migrar_a_version_2(conexion)
+        if version < 3:
+            _migrar_a_version_3(conexion)
+        conexion.execute(text(f"PRAGMA user_version = {VERSION_ESQUEMA}"))
+
+#Limita las sesiones abiertas a la vez (ver 'MAX_SESIONES').
+_sesiones_abiertas = anyio.Semaphore(MAX_SESIONES)
 
 #Define un generador para gestionar las sesiones de la base de datos.
-def get_session():
-    #Crea una nueva sesion usando el motor.
-    with Session(engine) as session:
-        #Proporciona la sesion a la funcion del endpoint.
-        yield session
-        #El bloque 'with' asegura que la sesion se cierre automaticamente.
+#Es asincrono para que el cierre de la sesion (que devuelve la conexion al pool) no tenga que esperar un hilo libre.
+async def get_session():
+    #Espera un lugar libre antes de abrir la sesion.
+    async with _sesiones_abiertas:
+        #Crea una nueva sesion usando el motor.
+        with Session(engine) as session:
+            #Proporciona la sesion a la funcion del endpoint.
+            yield session
+            #El bloque 'with' asegura que la sesion se cierre automaticamente.
 
 #Crea un alias 'SessionDep' para la inyeccion de dependencias de la sesion.
-SessionDep=Annotated[Session, Depends(get_session)] 
\ No newline at end of file
+SessionDep=Annotated[Session, Depends(get_session)]
+
+#Despues de confirmar la escritura, la sesion vuelve al motor normal: las lecturas posteriores
+#(refresh y carga de relaciones para la respuesta) no deben retener el bloqueo de escritura.
+#Tambien se marca como confirmada, para que un error posterior no repita la escritura (ver 'reintentar').
+def _al_confirmar(session):
+    session.info["confirmada"] = True
+    session.bind = engine
+
+#Crea una sesion de escritura (sus transacciones empiezan con BEGIN IMMEDIATE).
+def _sesion_escritura():
+    session = Session(engine_escritura)
+    event.listen(session, "after_commit", _al_confirmar)
+    return session
+
+#Define un generador para las sesiones de los endpoints que modifican la BD.
+#Tambien es asincrono, por la misma razon que 'get_session'.
+async def get_session_escritura():
+    async with _sesiones_abiertas:
+        with _sesion_escritura() as session:
+            yield session
+
+#Crea un alias 'SessionEscrituraDep' para la inyeccion de la sesion de escritura.
+SessionEscrituraDep=Annotated[Session, Depends(get_session_escritura)]
+
+#Indica si el error de SQLite es por un bloqueo (otro proceso o hilo esta escribiendo).
+def _bd_bloqueada(error):
+    mensaje = str(error.orig).lower()
+    return "locked" in mensaje or "busy" in mensaje
+
+#Ejecuta una operacion y la reintenta si la BD esta bloqueada, con espera exponencial (y aleatoria) entre intentos.
+#Si la sesion ya confirmo (commit) su escritura, el error no se reintenta: repetir la operacion la aplicaria dos veces.
+def reintentar(operacion, session=None):
+    espera = ESPERA_INICIAL
+    for intento in range(MAX_REINTENTOS + 1):
+        try:
+            return operacion()
+        except OperationalError as error:
+            #Deshace lo que quedo a medias antes de volver a intentar.
+            if session is not None:
+                session.rollback()
+            confirmada = session is not None and session.info.get("confirmada", False)
+            if confirmada or not _bd_bloqueada(error) or intento == MAX_REINTENTOS:
+                raise
+            time.sleep(random.uniform(0, espera))
+            espera = min(espera * 2, ESPERA_MAXIMA)
+
+#Abre una sesion de escritura, ejecuta 'operacion(session)' y la reintenta si la BD esta bloqueada.
+#Se usa para escrituras fuera de los endpoints con 'SessionEscrituraDep'.
+def escribir(operacion):
+    with _sesion_escritura() as session:
+        return reintentar(lambda: operacion(session), session)
+
+#Decorador para los endpoints que escriben en la BD (deben recibir la sesion como 'db').
+#Reintenta el endpoint completo si la BD esta bloqueada antes de confirmar la escritura (despues del commit ya no se reintenta)
+#y convierte los IntegrityError en un error 400.
+def con_reintentos(detalle_integridad="La operación viola una restricción de la base de datos"):
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            db = kwargs.get("db")
+            try:
+                return reintentar(lambda: funcion(*args, **kwargs), db)
+            except IntegrityError:
+                if db is not None:
+                    db.rollback()
+                raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detalle_integridad)
+        return envoltura
+    return decorador
@@ -0,0 +1,99 @@
+#Cache HTTP para las rutas de lectura (ETag, Last-Modified y GET condicionales).
+#El ETag se calcula solo con las columnas 'version' y 'actualizado_en' de los registros que aparecen en la respuesta,
+#sin cargar relaciones ni serializar nada. Si el cliente ya tiene esa version, se responde 304.
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime
+from fastapi import Request
+from fastapi.responses import Response
+from sqlmodel import Session, select
+from Modelos.modelos import Item, Categoria, Envio, ItemCategoria, ItemEnvio, ahora_utc
+
+
+#Marca un registro como modificado: aumenta su version y actualiza la fecha de modificacion.
+#Se debe llamar en cada ruta que modifique un Item, Envio o Categoria.
+def marcar_modificado(registro):
+    registro.version += 1
+    registro.actualizado_en = ahora_utc()
+
+
+#Ejecuta las consultas de versiones y calcula la huella (ETag) y la fecha de ultima modificacion.
+#Cada consulta debe tener 'actualizado_en' como ultima columna.
+#Devuelve None si 'requerida' es True y la primera consulta no tiene renglones (el registro no existe).
+def _huella(db: Session, consultas, requerida=False):
+    resumen = hashlib.blake2b(digest_size=16)
+    modificado = None
+    for k, consulta in enumerate(consultas):
+        filas = db.exec(consulta).all()
+        if k == 0 and requerida and not filas:
+            return None
+        resumen.update(repr((k, [tuple(f) for f in filas])).encode())
+        for fila in filas:
+            if modificado is None or fila[-1] > modificado:
+                modificado = fila[-1]
+    return f'"{resumen.hexdigest()}"', modificado
+
+
+#Version de las categorias (todas, o una sola si se indica su id).
+def version_categorias(db: Session, categoria_id=None):
+    consulta = select(Categoria.id, Categoria.version, Categoria.actualizado_en).order_by(Categoria.id)
+    if categoria_id is not None:
+        consulta = consulta.where(Categoria.id == categoria_id)
+    return _huella(db, [consulta], requerida=categoria_id is not None)
+
+
+#Version de los items (todos, o uno solo si se indica su id), incluyendo las categorias de cada uno.
+def version_items(db: Session, item_id=None):
+    consulta_items = select(Item.id, Item.version, Item.actualizado_en).order_by(Item.id)
+    consulta_categorias = (
+        select(ItemCategoria.item_id, Categoria.id, Categoria.version, Categoria.actualizado_en)
+        .join(Categoria, Categoria.id == ItemCategoria.categoria_id)
+        .order_by(ItemCategoria.item_id, Categoria.id)
+    )
+    if item_id is not None:
+        consulta_items = consulta_items.where(Item.id == item_id)
+        consulta_categorias = consulta_categorias.where(ItemCategoria.item_id == item_id)
+    return _huella(db, [consulta_items, consulta_categorias], requerida=item_id is not None)
+
+
+#Version de los envios (todos, o uno solo si se indica su id), incluyendo sus items y las categorias de estos.
+def version_envios(db: Session, envio_id=None):
+    consulta_envios = select(Envio.id, Envio.version, Envio.actualizado_en).order_by(Envio.id)
+    consulta_items = (
+        select(ItemEnvio.envio_id, Item.id, Item.version, Item.actualizado_en)
+        .join(Item, Item.id == ItemEnvio.item_id)
+        .order_by(ItemEnvio.envio_id, Item.id)
+    )
+    consulta_categorias = (
+        select(ItemEnvio.envio_id, ItemCategoria.item_id, Categoria.id, Categoria.version, Categoria.actualizado_en)
+        .join(ItemCategoria, ItemCategoria.item_id == ItemEnvio.item_id)
+        .join(Categoria, Categoria.id == ItemCategoria.categoria_id)
+        .order_by(ItemEnvio.envio_id, ItemCategoria.item_id, Categoria.id)
+    )
+    if envio_id is not None:
+        consulta_envios = consulta_envios.where(Envio.id == envio_id)
+        consulta_items = consulta_items.where(ItemEnvio.envio_id == envio_id)
+        consulta_categorias = consulta_categorias.where(ItemEnvio.envio_id == envio_id)
+    return _huella(db, [consulta_envios, consulta_items, consulta_categorias], requerida=envio_id is not None)
+
+
+#Construye las cabeceras de cache de una respuesta.
+def cabeceras_cache(etag, modificado):
+    cabeceras = {"ETag": etag, "Cache-Control": "no-cache"}
+    if modificado is not None:
+        #SQLite guarda las fechas en UTC; si vienen sin zona horaria se les asigna UTC.
+        if modificado.tzinfo is None:
+            modificado = modificado.replace(tzinfo=timezone.utc)
+        cabeceras["Last-Modified"] = format_datetime(modificado.astimezone(timezone.utc), usegmt=True)
+    return cabeceras
+
+
+#Si el ETag del cliente ('If-None-Match') coincide con el actual, devuelve la respuesta 304; si no, devuelve None.
+def respuesta_no_modificada(request: Request, etag, modificado):
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    etiquetas = {etiqueta.strip().removeprefix("W/") for etiqueta in if_none_match.split(",")}
+    if "*" in etiquetas or etag in etiquetas:
+        return Response(status_code=304, headers=cabeceras_cache(etag, modificado))
+    return None
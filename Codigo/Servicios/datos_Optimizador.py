@@ -0,0 +1,163 @@
+#Capa de datos del optimizador
+#Guarda, por envio, los ids, pesos y ganancias de sus items en un archivo mapeado en memoria (mmap).
+#Todos los workers (por ejemplo con gunicorn) mapean el mismo archivo, asi que los datos de un envio
+#se leen directamente de memoria compartida, sin copiarlos, en lugar de cargarlos desde la BD en cada peticion.
+#
+#El archivo es una foto de la BD en una 'generacion' (ver 'generacion_datos' en base_Datos).
+#Para saber si sigue al dia solo se lee ese contador; si cambio, el archivo se reconstruye completo
+#(una sola vez, por el primer worker que lo necesite) y se reemplaza de forma atomica.
+#Los archivos nunca se modifican en su lugar, asi que un lector no puede ver datos a medio escribir.
+import mmap
+import os
+import struct
+import threading
+from contextlib import contextmanager
+from sqlmodel import Session, select, text
+from Servicios.base_Datos import engine
+from Modelos.modelos import Item, ItemEnvio
+
+#fcntl no existe en Windows; ahi no se bloquea el archivo (solo se usa un worker).
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+#Ruta del archivo con la matriz de items (relativa, igual que 'database.db').
+RUTA_MATRIZ = "items_optimizador.bin"
+
+#Cabecera del archivo: formato, generacion de la BD, numero de envios (id maximo + 1) y numero de renglones.
+_CABECERA = struct.Struct("<qqqq")
+#Formato actual (2: renglones agrupados por envio). Los archivos de otro formato se reconstruyen.
+_FORMATO = 2
+#Cada valor ocupa 8 bytes (int64 para ids e inicios, float64 para peso y ganancia).
+_TAM_VALOR = 8
+
+#Consulta de la generacion actual de los datos en la BD.
+_CONSULTA_GENERACION = text("SELECT generacion FROM generacion_datos WHERE id = 1")
+
+
+#Matriz de items por envio guardada por columnas (formato CSR) en un archivo mapeado en memoria:
+#  inicios[envio_id] .. inicios[envio_id + 1] es el rango de renglones del envio en las columnas
+#  ids, pesos y ganancias (ordenados por id de item dentro de cada envio).
+class MatrizEnvios:
+    def __init__(self, ruta=RUTA_MATRIZ):
+        self.ruta = ruta
+        self._mapa = None
+        self._inodo = None
+        self.generacion = None
+        self.num_envios = 0
+        #Las rutas sincronas corren en varios hilos; este candado evita volver a mapear mientras otro hilo lee.
+        self._hilos = threading.RLock()
+
+    #Bloqueo entre procesos para reconstruir (se usa un archivo aparte porque el de datos se reemplaza).
+    @contextmanager
+    def _bloqueo(self):
+        with self._hilos, open(self.ruta + ".lock", "a+b") as archivo_bloqueo:
+            if fcntl is not None:
+                fcntl.flock(archivo_bloqueo, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(archivo_bloqueo, fcntl.LOCK_UN)
+
+    #Mapea el archivo actual y crea las vistas de cada columna (sin copiar los datos).
+    #Devuelve False si el archivo no existe o tiene otro formato.
+    #El mapa anterior no se cierra: las vistas que ya se entregaron lo mantienen vivo hasta que se liberan.
+    def _abrir(self):
+        self._mapa = None
+        self.generacion = None
+        try:
+            with open(self.ruta, "rb") as archivo:
+                self._inodo = os.fstat(archivo.fileno()).st_ino
+                mapa = mmap.mmap(archivo.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return False
+        formato, generacion, num_envios, num_renglones = _CABECERA.unpack_from(mapa, 0)
+        if formato != _FORMATO:
+            return False
+        vista = memoryview(mapa)
+        inicio = _CABECERA.size
+        fin = inicio + (num_envios + 1) * _TAM_VALOR
+        self.inicios = vista[inicio:fin].cast("q")
+        tam_columna = num_renglones * _TAM_VALOR
+        self.ids = vista[fin:fin + tam_columna].cast("q")
+        self.pesos = vista[fin + tam_columna:fin + 2 * tam_columna].cast("d")
+        self.ganancias = vista[fin + 2 * tam_columna:fin + 3 * tam_columna].cast("d")
+        self._mapa = mapa
+        self.generacion = generacion
+        self.num_envios = num_envios
+        return True
+
+    #Vuelve a mapear el archivo si otro proceso lo reemplazo.
+    #Devuelve False si el archivo no existe o tiene otro formato.
+    def _vigente(self):
+        try:
+            inodo = os.stat(self.ruta).st_ino
+        except FileNotFoundError:
+            self._mapa = None
+            self.generacion = None
+            return False
+        if self._mapa is None or inodo != self._inodo:
+            return self._abrir()
+        return True
+
+    #Escribe un archivo nuevo con los renglones (envio_id, item_id, peso, ganancia), ordenados por envio,
+    #y reemplaza al anterior de forma atomica.
+    def _escribir(self, generacion, renglones):
+        num_envios = max((r[0] for r in renglones), default=0) + 1
+        #Cuenta los renglones de cada envio y calcula donde empieza cada uno.
+        inicios = [0] * (num_envios + 1)
+        for envio_id, _, _, _ in renglones:
+            inicios[envio_id + 1] += 1
+        for k in range(num_envios):
+            inicios[k + 1] += inicios[k]
+        n = len(renglones)
+        temporal = self.ruta + ".tmp"
+        with open(temporal, "wb") as archivo:
+            archivo.write(_CABECERA.pack(_FORMATO, generacion, num_envios, n))
+            archivo.write(struct.pack(f"<{num_envios + 1}q", *inicios))
+            archivo.write(struct.pack(f"<{n}q", *(r[1] for r in renglones)))
+            archivo.write(struct.pack(f"<{n}d", *(r[2] for r in renglones)))
+            archivo.write(struct.pack(f"<{n}d", *(r[3] for r in renglones)))
+        os.replace(temporal, self.ruta)
+        self._abrir()
+
+    #Reconstruye la matriz desde la BD si su generacion no coincide con la de la BD.
+    #Se vuelve a revisar dentro del bloqueo: si otro worker ya la reconstruyo, solo se mapea su archivo.
+    #La generacion y los renglones se leen en la misma transaccion, asi el archivo es una foto consistente.
+    def reconstruir(self):
+        with self._bloqueo(), engine.connect() as conexion:
+            generacion = conexion.execute(_CONSULTA_GENERACION).scalar()
+            if self._vigente() and self.generacion == generacion:
+                return
+            renglones = conexion.execute(
+                select(ItemEnvio.envio_id, Item.id, Item.peso, Item.ganancia)
+                .join(Item, Item.id == ItemEnvio.item_id)
+                .order_by(ItemEnvio.envio_id, Item.id)
+            ).all()
+            self._escribir(generacion, renglones)
+
+    #Devuelve los ids, pesos y ganancias de los items de un envio como vistas de la memoria compartida.
+    #'generacion' es la generacion de la BD que vio la peticion; si la matriz no coincide, se reconstruye.
+    def vectores(self, envio_id, generacion):
+        with self._hilos:
+            if not self._vigente() or self.generacion != generacion:
+                self.reconstruir()
+            #Un envio que no esta en la matriz no tiene items (vistas vacias).
+            a = b = 0
+            if 0 <= envio_id < self.num_envios:
+                a, b = self.inicios[envio_id], self.inicios[envio_id + 1]
+            return self.ids[a:b], self.pesos[a:b], self.ganancias[a:b]
+
+
+#Instancia compartida por todas las rutas del proceso.
+#No se construye al arrancar: el primer uso del optimizador la mapea (o la reconstruye si hace falta).
+matriz_envios = MatrizEnvios()
+
+
+#Obtiene los ids, pesos y ganancias de los items de un envio (ordenados por id de item).
+#En la BD solo se lee el contador de generacion; los datos salen de la matriz compartida.
+def vectores_envio(session: Session, envio_id):
+    generacion = session.exec(_CONSULTA_GENERACION).scalar()
+    return matriz_envios.vectores(envio_id, generacion)
@@ -0,0 +1,79 @@
+#Metodos para resolver el problema de la mochila
+#Registro de metodos por nombre, para poder elegirlos desde la API o desde la linea de comandos.
+#Cada metodo recibe (pesos, valores, capacidad, **parametros) y devuelve (genes, aptitud).
+from Servicios.algoritmo_Genetico import AlgoritmoGenetico, SeleccionRuleta, SeleccionTorneo
+
+
+#Crea un metodo que ejecuta el algoritmo genetico con el metodo de seleccion indicado.
+#No imprime el progreso de cada generacion (se usa para resolver muchas instancias).
+def _metodo_genetico(clase_seleccion):
+    def resolver(pesos, valores, capacidad, **parametros):
+        ag = AlgoritmoGenetico(pesos, valores, capacidad, clase_seleccion(), **parametros)
+        mejor = None
+        for _, _, mejor in ag.ejecutar_por_generacion():
+            pass
+        #Sin generaciones no hay ningun resultado que devolver.
+        if mejor is None:
+            raise ValueError("El algoritmo genetico necesita al menos una generacion")
+        return mejor.genes, mejor.aptitud
+    return resolver
+
+
+#Resuelve la mochila de forma exacta con ramificacion y poda (branch and bound).
+#Los objetos se ordenan por ganancia/peso y la cota es la solucion de la mochila fraccionaria,
+#asi funciona con pesos decimales (a diferencia de la programacion dinamica).
+#Los parametros del algoritmo genetico (generaciones, seed, etc.) se ignoran.
+def resolver_exacto(pesos, valores, capacidad, **parametros):
+    #Los objetos sin ganancia (o con ganancia negativa) nunca mejoran la solucion, asi que se descartan desde el inicio.
+    #Si se dejaran, uno de peso 0 y ganancia 0 quedaria primero (razon infinita) y cortaria la cota.
+    orden = sorted((i for i in range(len(pesos)) if valores[i] > 0),
+                   key=lambda i: valores[i] / pesos[i] if pesos[i] > 0 else float("inf"), reverse=True)
+    n = len(orden)
+    p = [pesos[i] for i in orden]
+    v = [valores[i] for i in orden]
+
+    #Cota superior: llena de forma voraz y completa con la fraccion del siguiente objeto
+    def cota(k, peso, valor):
+        for j in range(k, n):
+            if peso + p[j] <= capacidad:
+                peso += p[j]
+                valor += v[j]
+            else:
+                return valor + (capacidad - peso) * v[j] / p[j]
+        return valor
+
+    mejor_valor = 0
+    mejor_tomados = None
+    #Cada nodo es (siguiente objeto, peso, valor, objetos tomados como lista enlazada)
+    pila = [(0, 0, 0, None)]
+    while pila:
+        k, peso, valor, tomados = pila.pop()
+        if valor > mejor_valor:
+            mejor_valor, mejor_tomados = valor, tomados
+        if k == n or cota(k, peso, valor) <= mejor_valor:
+            continue
+        #Primero se explora la rama que mete el objeto (se agrega al final de la pila)
+        pila.append((k + 1, peso, valor, tomados))
+        if peso + p[k] <= capacidad:
+            pila.append((k + 1, peso + p[k], valor + v[k], (k, tomados)))
+
+    genes = [0] * len(pesos)
+    while mejor_tomados is not None:
+        k, mejor_tomados = mejor_tomados
+        genes[orden[k]] = 1
+    return genes, mejor_valor
+
+
+#Metodos registrados
+METODOS = {
+    "ruleta": _metodo_genetico(SeleccionRuleta),
+    "torneo": _metodo_genetico(SeleccionTorneo),
+    "exacto": resolver_exacto,
+}
+
+
+#Resuelve una instancia con el metodo indicado por su nombre.
+def resolver(metodo, pesos, valores, capacidad, **parametros):
+    if metodo not in METODOS:
+        raise ValueError(f"Metodo desconocido: {metodo}. Opciones: {', '.join(METODOS)}")
+    return METODOS[metodo](pesos, valores, capacidad, **parametros)
@@ -0,0 +1,98 @@
+import re
+import orjson
+from fastapi.responses import JSONResponse, Response
+from sqlalchemy import literal_column
+from sqlmodel import Session, select
+from Modelos.modelos import Item, Categoria, Envio, ItemCategoria, ItemEnvio
+
+
+#Numeros que orjson escribe distinto que el modulo json: con exponente (1e16 en lugar de 1e+16)
+#o decimales muy pequenos (0.00001 en lugar de 1e-05). Puede coincidir tambien dentro de un texto;
+#en ese caso solo se usa el camino lento, y la respuesta sigue siendo la misma.
+_NUMERO_DISTINTO = re.compile(rb"[:,\[]-?(?:\d+(?:\.\d+)?e|0\.0000)")
+
+
+#Define una respuesta JSON que serializa con orjson en lugar del modulo json estandar.
+#Se usa en las rutas de lectura para evitar validar objeto por objeto con Pydantic.
+class RespuestaORJSON(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        #orjson ya produce JSON compacto en UTF-8, igual que el JSONResponse de FastAPI.
+        contenido = orjson.dumps(content)
+        #Si hay numeros muy grandes o muy pequenos, serializa igual que JSONResponse para dar los mismos bytes.
+        if _NUMERO_DISTINTO.search(contenido):
+            return JSONResponse.render(self, content)
+        return contenido
+
+
+#Obtiene las categorias de varios items en una sola consulta y las agrupa por item.
+def categorias_por_item(db: Session, item_ids):
+    #Prepara un diccionario vacio para cada item solicitado.
+    categorias = {item_id: [] for item_id in item_ids}
+    #Si no hay items, no es necesario consultar la BD.
+    if not categorias:
+        return categorias
+    #Consulta la tabla de enlace unida con 'categoria' y devuelve tuplas simples.
+    #Las categorias de cada item quedan ordenadas por id, igual que al cargar la relacion 'Item.categorias'.
+    filas = db.exec(
+        select(ItemCategoria.item_id, Categoria.nombre, Categoria.descripcion, Categoria.id)
+        .join(Categoria, Categoria.id == ItemCategoria.categoria_id)
+        .where(ItemCategoria.item_id.in_(categorias.keys()))
+        .order_by(Categoria.id)
+    )
+    #Construye cada categoria con el mismo orden de campos que 'CategoriaOut'.
+    for item_id, nombre, descripcion, categoria_id in filas:
+        categorias[item_id].append({"nombre": nombre, "descripcion": descripcion, "id": categoria_id})
+    return categorias
+
+
+#Construye los diccionarios de items con la misma forma que 'ItemOut'.
+#Si 'item_ids' es None se devuelven todos los items.
+def items_como_dict(db: Session, item_ids=None):
+    #Selecciona solo las columnas necesarias, sin crear objetos ORM.
+    consulta = select(Item.ganancia, Item.peso, Item.id).order_by(Item.id)
+    if item_ids is not None:
+        consulta = consulta.where(Item.id.in_(item_ids))
+    filas = db.exec(consulta).all()
+    #Carga las categorias de todos los items de una sola vez.
+    categorias = categorias_por_item(db, [fila[2] for fila in filas])
+    return [
+        {"ganancia": ganancia, "peso": peso, "id": item_id, "categorias": categorias[item_id]}
+        for ganancia, peso, item_id in filas
+    ]
+
+
+#Construye los diccionarios de envios con la misma forma que 'EnvioOut'.
+#Si 'envio_ids' es None se devuelven todos los envios.
+def envios_como_dict(db: Session, envio_ids=None):
+    #Selecciona las columnas del envio como tuplas.
+    consulta = select(Envio.destino, Envio.id).order_by(Envio.id)
+    if envio_ids is not None:
+        consulta = consulta.where(Envio.id.in_(envio_ids))
+    envios = db.exec(consulta).all()
+    #Prepara la lista de items de cada envio.
+    items_por_envio = {envio_id: [] for _, envio_id in envios}
+    if not items_por_envio:
+        return []
+
+    #Consulta los items de todos los envios en una sola operacion.
+    #Los items de cada envio quedan en el orden en que se agregaron (rowid de 'itemenvio'),
+    #igual que al cargar la relacion 'Envio.items'.
+    filas = db.exec(
+        select(ItemEnvio.envio_id, Item.ganancia, Item.peso, Item.id)
+        .join(Item, Item.id == ItemEnvio.item_id)
+        .where(ItemEnvio.envio_id.in_(items_por_envio.keys()))
+        .order_by(ItemEnvio.envio_id, literal_column("itemenvio.rowid"))
+    ).all()
+    #Carga las categorias de todos los items involucrados.
+    categorias = categorias_por_item(db, {fila[3] for fila in filas})
+    for envio_id, ganancia, peso, item_id in filas:
+        items_por_envio[envio_id].append(
+            {"ganancia": ganancia, "peso": peso, "id": item_id, "categorias": categorias[item_id]}
+        )
+
+    return [
+        {"destino": destino, "id": envio_id, "items": items_por_envio[envio_id]}
+        for destino, envio_id in envios
+    ]
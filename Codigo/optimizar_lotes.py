@@ -0,0 +1,194 @@
+#Optimizador por lotes (sin servidor HTTP)
+#Resuelve muchas instancias del problema de la mochila en paralelo y escribe los resultados en JSON-lines.
+#
+#Uso (desde la carpeta 'Codigo'):
+#  python optimizar_lotes.py instancias.jsonl --metodo torneo --salida resultados.jsonl
+#  python optimizar_lotes.py instancias.csv --metodo exacto --procesos 8
+#  python optimizar_lotes.py --bd --capacidad 300 --envios 1 2 --metodo ruleta
+#
+#Formatos de entrada:
+#  JSON-lines: un objeto por linea {"id": ..., "capacidad": ..., "pesos": [...], "ganancias": [...]}
+#  CSV: un renglon por objeto con las columnas instancia,capacidad,peso,ganancia
+#       (los renglones de una misma instancia deben ir seguidos)
+#  BD: los envios de 'database.db' (todos, o los indicados con --envios) con la capacidad de --capacidad
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import Pool
+from Servicios.metodos_Mochila import METODOS, resolver
+
+
+#Lee instancias de un archivo JSON-lines, una por linea.
+def leer_jsonl(ruta):
+    with open(ruta, encoding="utf-8") as archivo:
+        for linea in archivo:
+            if linea.strip():
+                datos = json.loads(linea)
+                yield {
+                    "id": datos.get("id"),
+                    "capacidad": float(datos["capacidad"]),
+                    "pesos": [float(p) for p in datos["pesos"]],
+                    "ganancias": [float(g) for g in datos["ganancias"]],
+                }
+
+
+#Lee instancias de un CSV con un renglon por objeto, agrupando los renglones seguidos de cada instancia.
+def leer_csv(ruta):
+    with open(ruta, newline="", encoding="utf-8") as archivo:
+        for instancia, renglones in itertools.groupby(csv.DictReader(archivo), key=lambda r: r["instancia"]):
+            renglones = list(renglones)
+            yield {
+                "id": instancia,
+                "capacidad": float(renglones[0]["capacidad"]),
+                "pesos": [float(r["peso"]) for r in renglones],
+                "ganancias": [float(r["ganancia"]) for r in renglones],
+            }
+
+
+#Lee los envios de la BD. Los items se leen en orden de envio y se agrupan sin cargar todo en memoria.
+def leer_bd(capacidad, envio_ids=None):
+    from sqlmodel import select
+    from Servicios.base_Datos import engine
+    from Modelos.modelos import Item, ItemEnvio
+
+    consulta = (
+        select(ItemEnvio.envio_id, Item.peso, Item.ganancia)
+        .join(Item, Item.id == ItemEnvio.item_id)
+        .order_by(ItemEnvio.envio_id, Item.id)
+    )
+    if envio_ids:
+        consulta = consulta.where(ItemEnvio.envio_id.in_(envio_ids))
+    with engine.connect() as conexion:
+        filas = conexion.execution_options(yield_per=1000).execute(consulta)
+        for envio_id, renglones in itertools.groupby(filas, key=lambda r: r[0]):
+            renglones = list(renglones)
+            yield {
+                "id": envio_id,
+                "capacidad": capacidad,
+                "pesos": [r[1] for r in renglones],
+                "ganancias": [r[2] for r in renglones],
+            }
+
+
+#Tipos para argparse: validan los numeros con los mismos limites que la API (ge=1, y 0 <= p <= 1).
+def _entero_positivo(texto):
+    try:
+        valor = int(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"debe ser un numero entero (se recibio {texto})")
+    if valor < 1:
+        raise argparse.ArgumentTypeError(f"debe ser un entero mayor o igual a 1 (se recibio {texto})")
+    return valor
+
+
+def _proporcion(texto):
+    try:
+        valor = float(texto)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"debe ser un numero (se recibio {texto})")
+    if not 0 <= valor <= 1:
+        raise argparse.ArgumentTypeError(f"debe estar entre 0 y 1 (se recibio {texto})")
+    return valor
+
+
+#Resuelve una instancia (se ejecuta en los procesos del Pool).
+def _resolver_instancia(tarea):
+    instancia, metodo, parametros = tarea
+    inicio = time.perf_counter()
+    genes, aptitud = resolver(metodo, instancia["pesos"], instancia["ganancias"], instancia["capacidad"], **parametros)
+    return {
+        "id": instancia["id"],
+        "metodo": metodo,
+        "ganancia_total": aptitud,
+        "peso_total": sum(p for p, gen in zip(instancia["pesos"], genes) if gen == 1),
+        "mejor_genes": genes,
+        "segundos": time.perf_counter() - inicio,
+    }
+
+
+#Arma las tareas; cada instancia recibe su propia semilla para que el resultado no dependa del orden de los procesos.
+def _tareas(instancias, metodo, parametros, seed):
+    for k, instancia in enumerate(instancias):
+        parametros_instancia = dict(parametros)
+        if seed is not None:
+            parametros_instancia["seed"] = seed + k
+        yield instancia, metodo, parametros_instancia
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Resuelve instancias de la mochila por lotes y escribe resultados en JSON-lines.")
+    parser.add_argument("entrada", nargs="?", help="Archivo .jsonl o .csv con las instancias")
+    parser.add_argument("--formato", choices=["jsonl", "csv"], help="Formato de la entrada (por defecto, segun la extension)")
+    parser.add_argument("--bd", action="store_true", help="Lee los envios desde database.db")
+    parser.add_argument("--envios", type=int, nargs="*", help="IDs de los envios a resolver (con --bd; por defecto todos)")
+    parser.add_argument("--capacidad", type=float, help="Capacidad de la mochila para los envios (con --bd)")
+    parser.add_argument("--metodo", default="torneo", choices=sorted(METODOS), help="Metodo de solucion")
+    parser.add_argument("--generaciones", type=_entero_positivo, default=30, help="Número de generaciones")
+    parser.add_argument("--poblacion", type=_entero_positivo, default=10, help="Tamaño de la población")
+    parser.add_argument("--prob-mutacion", type=_proporcion, default=0.05, help="Probabilidad de mutacion")
+    parser.add_argument("--prop-voraz", type=_proporcion, default=0.0, help="Proporcion de la poblacion inicial sembrada de forma voraz")
+    parser.add_argument("--busqueda-local", action="store_true", help="Aplica busqueda local a la elite de cada generacion")
+    parser.add_argument("--seed", type=int, help="Semilla base (la instancia k usa seed + k)")
+    #os.cpu_count() puede devolver None si no se puede determinar el numero de CPUs.
+    parser.add_argument("--procesos", type=_entero_positivo, default=os.cpu_count() or 1, help="Número de procesos en paralelo")
+    parser.add_argument("--salida", help="Archivo de salida .jsonl (por defecto, la salida estandar)")
+    args = parser.parse_args(argumentos)
+
+    #Elige de donde se leen las instancias.
+    if args.bd:
+        if args.capacidad is None:
+            parser.error("--bd requiere --capacidad")
+        instancias = leer_bd(args.capacidad, args.envios)
+    elif args.entrada:
+        formato = args.formato or ("csv" if args.entrada.lower().endswith(".csv") else "jsonl")
+        instancias = leer_csv(args.entrada) if formato == "csv" else leer_jsonl(args.entrada)
+    else:
+        parser.error("indica un archivo de entrada o --bd")
+
+    parametros = {}
+    if args.metodo != "exacto":
+        parametros = {
+            "generaciones": args.generaciones,
+            "num_individuos": args.poblacion,
+            "prob_mutacion": args.prob_mutacion,
+            "prop_voraz": args.prop_voraz,
+            "busqueda_local": args.busqueda_local,
+        }
+
+    salida = open(args.salida, "w", encoding="utf-8") if args.salida else sys.stdout
+    tareas = _tareas(instancias, args.metodo, parametros, args.seed)
+    #Las tareas se mandan al Pool por bloques, para no leer toda la entrada en memoria.
+    tam_bloque = args.procesos * 64
+    total = 0
+    segundos_resolviendo = 0.0
+    inicio = time.perf_counter()
+    try:
+        with Pool(args.procesos) as pool:
+            while True:
+                bloque = list(itertools.islice(tareas, tam_bloque))
+                if not bloque:
+                    break
+                for resultado in pool.imap(_resolver_instancia, bloque, chunksize=8):
+                    salida.write(json.dumps(resultado) + "\n")
+                    total += 1
+                    segundos_resolviendo += resultado["segundos"]
+    finally:
+        if salida is not sys.stdout:
+            salida.close()
+
+    #Estadisticas de rendimiento.
+    transcurrido = time.perf_counter() - inicio
+    print(f"Instancias resueltas: {total}", file=sys.stderr)
+    print(f"Tiempo total: {transcurrido:.3f} s ({args.procesos} procesos, metodo {args.metodo})", file=sys.stderr)
+    if total:
+        print(f"Rendimiento: {total / transcurrido:.1f} instancias/s", file=sys.stderr)
+        print(f"Tiempo promedio por instancia: {segundos_resolviendo / total * 1000:.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
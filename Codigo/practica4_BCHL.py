@@ -5,20 +5,26 @@
 #Higuera Pineda Angel Abraham
 #Lorenzo Silva Abad Rey
 
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from Servicios.base_Datos import create_db_and_tables
 from Rutas import categorias, items, envios, optimizar
 
+#Define el ciclo de vida de la aplicacion (reemplaza al evento 'startup', que esta obsoleto).
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    #Crea las tablas solo si la version del esquema no esta al dia.
+    create_db_and_tables()
+    #La matriz compartida del optimizador no se construye aqui: se mapea (o reconstruye) en su primer uso.
+    yield
+
 app = FastAPI(
     title="Práctica 4: Relaciones con Base de Datos (Ordenado)",
     description="API para gestionar Items, Categorías y Envíos, con persistencia de datos.",
-    version="2.1.1"
+    version="2.1.1",
+    lifespan=lifespan
 )
 
-@app.on_event("startup")
-def on_startup():
-    create_db_and_tables()
-
 #Registrar rutas
 app.include_router(categorias.router)
 app.include_router(items.router)